@@ -0,0 +1,205 @@
+"""
+Load test for the local HTTP/JSON API server.
+
+Starts a TaskApiServer on localhost in a child process over a scratch data
+directory seeded with tasks, then drives it from one asyncio client with
+many keep-alive connections. Each connection sends a mix of list, get,
+create and update requests; throughput and per-request latency (mean, p50,
+p99 in milliseconds) are reported for every kind of request.
+
+Usage: python benchmarks/api_load_test.py [--tasks 10000] [--connections 50]
+                                          [--requests 20000] [--port 8765]
+                                          [--url http://127.0.0.1:8765]
+Pass --url to test a server that is already running instead of starting one.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ids import new_ids
+from storage import TaskStorage
+
+USERNAME = "loadtest"
+PRIORITIES = ["Low", "Medium", "High"]
+CATEGORIES = ["Personal", "Work", "Study", "Health", "Shopping", "Other"]
+# Share of each request kind in the mix
+MIX = [("list", 0.4), ("get", 0.3), ("create", 0.15), ("update", 0.15)]
+
+
+def seed(data_dir, size):
+    """Write a user file with size synthetic tasks and return their ids"""
+    rng = random.Random(size)
+    ids = new_ids(size)
+    tasks = [
+        {
+            'id': task_id,
+            'name': f"Seed task {i}",
+            'priority': rng.choice(PRIORITIES),
+            'due_date': f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            'category': rng.choice(CATEGORIES),
+            'status': "Completed" if rng.random() < 0.3 else "Pending",
+            'created_at': "2026-01-01 09:00:00"
+        }
+        for i, task_id in enumerate(ids)
+    ]
+    TaskStorage(data_dir, journal=True).save_tasks(USERNAME, tasks)
+    return ids
+
+
+def serve(data_dir, port):
+    """Child process: run the API server until terminated"""
+    from api_server import main
+    main(["--data-dir", data_dir, "--port", str(port), "--backend", "json"])
+
+
+async def request(reader, writer, method, path, body=None):
+    """Send one keep-alive request and return (status, decoded JSON)"""
+    data = json.dumps(body).encode('utf-8') if body is not None else b""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(data)}\r\n\r\n"
+        .encode('latin-1') + data
+    )
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line == b"\r\n":
+            break
+        name, _, value = line.decode('latin-1').partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def client(host, port, number, count, ids, latencies, errors):
+    """One connection sending count requests from the mix"""
+    rng = random.Random(number)
+    kinds = [kind for kind, _ in MIX]
+    weights = [weight for _, weight in MIX]
+    reader, writer = await asyncio.open_connection(host, port)
+    base = f"/users/{USERNAME}/tasks"
+    try:
+        for i in range(count):
+            kind = rng.choices(kinds, weights)[0]
+            if kind == "list":
+                status_filter = rng.choice(["", "&status=Pending", "&status=Completed"])
+                args = ("GET", f"{base}?limit=50&offset={rng.randint(0, 500)}&sort=priority{status_filter}")
+            elif kind == "get":
+                args = ("GET", f"{base}/{rng.choice(ids)}")
+            elif kind == "create":
+                args = ("POST", base, {'name': f"Load task {number}-{i}", 'priority': rng.choice(PRIORITIES),
+                                       'category': rng.choice(CATEGORIES)})
+            else:
+                args = ("PATCH", f"{base}/{rng.choice(ids)}", {'priority': rng.choice(PRIORITIES)})
+            start = time.perf_counter()
+            status, _ = await request(reader, writer, *args)
+            latencies[kind].append((time.perf_counter() - start) * 1000)
+            if status >= 400:
+                errors[kind] += 1
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+async def wait_for_server(host, port, timeout=30):
+    """Poll until the server accepts connections"""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+            # The first request also loads the user's tasks into the cache
+            await request(reader, writer, "GET", f"/users/{USERNAME}/stats")
+            writer.close()
+            await writer.wait_closed()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+async def run(host, port, connections, total, ids):
+    """Run every client at once; returns (latencies, errors, seconds)"""
+    await wait_for_server(host, port)
+    latencies = {kind: [] for kind, _ in MIX}
+    errors = {kind: 0 for kind, _ in MIX}
+    per_client = max(1, total // connections)
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        client(host, port, number, per_client, ids, latencies, errors) for number in range(connections)
+    ))
+    return latencies, errors, time.perf_counter() - start
+
+
+def report(latencies, errors, elapsed):
+    """Print throughput and latency per request kind"""
+    done = sum(len(values) for values in latencies.values())
+    print(f"{done} requests in {elapsed:.2f} s: {done / elapsed:.0f} requests/s")
+    print(f"{'request':10} {'count':>8} {'errors':>7} {'mean ms':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    for kind, values in latencies.items():
+        if not values:
+            continue
+        values.sort()
+        p99 = values[min(len(values) - 1, int(len(values) * 0.99))]
+        print(f"{kind:10} {len(values):>8} {errors[kind]:>7} {statistics.mean(values):>9.2f} "
+              f"{statistics.median(values):>9.2f} {p99:>9.2f}")
+
+
+async def fetch_ids(host, port):
+    """Ids of the first page of the load-test user's tasks on a running server"""
+    reader, writer = await asyncio.open_connection(host, port)
+    _, page = await request(reader, writer, "GET", f"/users/{USERNAME}/tasks?limit=1000")
+    writer.close()
+    await writer.wait_closed()
+    if not page.get('tasks'):
+        raise SystemExit(f"User {USERNAME} has no tasks on {host}:{port}")
+    return [task['id'] for task in page['tasks']]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--connections", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--url", help="test an already running server; its user must have tasks")
+    args = parser.parse_args()
+
+    data_dir = None
+    process = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port
+        ids = None
+    else:
+        host, port = "127.0.0.1", args.port
+        data_dir = tempfile.mkdtemp(prefix="api_load_")
+        ids = seed(data_dir, args.tasks)
+        process = multiprocessing.Process(target=serve, args=(data_dir, port), daemon=True)
+        process.start()
+    try:
+        if ids is None:
+            ids = asyncio.run(fetch_ids(host, port))
+        latencies, errors, elapsed = asyncio.run(run(host, port, args.connections, args.requests, ids))
+        report(latencies, errors, elapsed)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.join()
+        if data_dir is not None:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Memory benchmark for the in-memory task representations.
+
+Builds the same synthetic task set as plain dictionaries, as __dict__-based
+objects (the previous Task layout), as slotted Task objects and as a columnar
+TaskTable. Each layout is built from the parsed JSON file contents, and the
+report shows what stays allocated once the parsed dictionaries are dropped,
+plus the peak while loading, according to tracemalloc.
+
+Usage: python benchmarks/memory_benchmark.py [number_of_tasks]
+"""
+import gc
+import json
+import os
+import random
+import sys
+import tracemalloc
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from storage import Task
+from task_table import TaskTable
+
+
+class DictTask:
+    """The previous Task layout: seven string attributes in a __dict__"""
+    def __init__(self, data):
+        self.id = data['id']
+        self.name = data['name']
+        self.priority = data['priority']
+        self.due_date = data['due_date']
+        self.category = data['category']
+        self.status = data['status']
+        self.created_at = data['created_at']
+
+
+def make_tasks_json(count):
+    """Synthetic task file contents shaped like data/<user>_tasks.json"""
+    rng = random.Random(42)
+    start = date(2024, 1, 1)
+    tasks = [
+        {
+            'id': f"{20240101000000000000 + i}",
+            'name': f"Task number {i} " + "x" * rng.randint(0, 20),
+            'priority': rng.choice(["Low", "Medium", "High"]),
+            'due_date': (start + timedelta(days=rng.randint(0, 720))).isoformat(),
+            'category': rng.choice(["Personal", "Work", "Study", "Health", "Shopping", "Other"]),
+            'status': rng.choice(["Pending", "Completed"]),
+            'created_at': f"2024-01-{1 + i % 28:02d} 12:{i % 60:02d}:{i % 60:02d}",
+        }
+        for i in range(count)
+    ]
+    return json.dumps(tasks)
+
+
+def measure(build, text):
+    """Return (bytes still held, peak bytes) after loading text into a structure"""
+    gc.collect()
+    tracemalloc.start()
+    result = build(json.loads(text))
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current, peak
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    text = make_tasks_json(count)
+    layouts = [
+        ("dicts (json.load)", lambda rows: rows),
+        ("Task with __dict__", lambda rows: [DictTask(row) for row in rows]),
+        ("Task with __slots__", lambda rows: [Task.from_dict(row) for row in rows]),
+        ("TaskTable (columnar)", TaskTable.from_dicts),
+    ]
+
+    print(f"{count} tasks")
+    print(f"{'layout':<24}{'held MB':>10}{'peak MB':>10}{'bytes/task':>12}")
+    for label, build in layouts:
+        current, peak = measure(build, text)
+        print(f"{label:<24}{current / 1e6:>10.1f}{peak / 1e6:>10.1f}{current / count:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
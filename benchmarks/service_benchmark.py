@@ -0,0 +1,150 @@
+"""
+Benchmark suite for TaskService, run without any GUI.
+
+For each task-set size it seeds a fresh data directory, loads it through
+TaskService on top of a journaling TaskStorage, and times the everyday
+operations. Latencies are reported per operation (mean, p50, p99 in
+microseconds); peak memory of loading and filtering is measured in a
+separate pass under tracemalloc so tracing doesn't skew the timings.
+
+Usage: python benchmarks/service_benchmark.py [--sizes 1000,10000,100000,1000000]
+                                              [--ops 1000] [--json results.json]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ids import new_ids
+from storage import TaskStorage
+from task_service import TaskService
+
+USERNAME = "bench"
+PRIORITIES = ["Low", "Medium", "High"]
+CATEGORIES = ["Personal", "Work", "Study", "Health", "Shopping", "Other"]
+
+
+def seed(storage, size):
+    """Write a user file with size synthetic tasks"""
+    rng = random.Random(size)
+    tasks = [
+        {
+            'id': task_id,
+            'name': f"Seed task {i}",
+            'priority': rng.choice(PRIORITIES),
+            'due_date': f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            'category': rng.choice(CATEGORIES),
+            'status': "Completed" if rng.random() < 0.3 else "Pending",
+            'created_at': "2026-01-01 09:00:00"
+        }
+        for i, task_id in enumerate(new_ids(size))
+    ]
+    storage.save_tasks(USERNAME, tasks)
+
+
+def timed(fn, args_list):
+    """Run fn once per argument tuple and return latencies in microseconds"""
+    latencies = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        latencies.append((time.perf_counter() - start) * 1e6)
+    return latencies
+
+
+def summarize(latencies):
+    """Mean, median and 99th percentile of a latency list"""
+    ordered = sorted(latencies)
+    return {
+        'count': len(ordered),
+        'mean_us': statistics.fmean(ordered),
+        'p50_us': ordered[len(ordered) // 2],
+        'p99_us': ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))],
+    }
+
+
+def run_size(size, ops):
+    """Benchmark every operation for one task-set size"""
+    data_dir = tempfile.mkdtemp(prefix="todo-bench-")
+    try:
+        storage = TaskStorage(data_dir, journal=True)
+        seed(storage, size)
+        service = TaskService(storage, USERNAME)
+        results = {}
+
+        results['load'] = summarize(timed(service.load, [()]))
+        ops = min(ops, size)
+
+        added = []
+        def add(i):
+            added.append(service.add_task(f"Bench task {i}", "High", "2026-06-01", "Work"))
+        results['add'] = summarize(timed(add, [(i,) for i in range(ops)]))
+
+        ids = [task.id for task in added]
+        results['update'] = summarize(timed(
+            lambda task_id, i: service.update_task(task_id, name=f"Renamed task {i}", priority="Low"),
+            [(task_id, i) for i, task_id in enumerate(ids)]
+        ))
+        results['complete'] = summarize(timed(service.complete_task, [(task_id,) for task_id in ids]))
+        results['name_check'] = summarize(timed(
+            service.tasks.name_exists, [(f"seed task {i}",) for i in range(ops)]
+        ))
+        results['stats'] = summarize(timed(service.stats.summary, [()] * 10))
+        for filter_name in ("All", "Pending", "Completed"):
+            results[f'filter_{filter_name.lower()}'] = summarize(
+                timed(service.filter_tasks, [(filter_name,)] * 5)
+            )
+        results['query_category'] = summarize(timed(
+            lambda: service.query(category="Work", status="Pending"), [()] * 5
+        ))
+        results['delete'] = summarize(timed(service.delete_task, [(task_id,) for task_id in ids]))
+        results['save_all'] = summarize(timed(service.save, [()]))
+
+        # Memory pass
+        fresh = TaskService(TaskStorage(data_dir, journal=True), USERNAME)
+        tracemalloc.start()
+        fresh.load()
+        fresh.filter_tasks("Pending")
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results['peak_memory_mb'] = peak / 1e6
+        return results
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark TaskService operations")
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000",
+                        help="comma-separated task-set sizes")
+    parser.add_argument("--ops", type=int, default=1000,
+                        help="mutations timed per operation and size")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    report = {}
+    for size in (int(s) for s in args.sizes.split(",")):
+        results = run_size(size, args.ops)
+        report[size] = results
+        print(f"\n== {size} tasks (peak memory {results['peak_memory_mb']:.1f} MB) ==")
+        print(f"{'operation':<18}{'count':>7}{'mean us':>12}{'p50 us':>12}{'p99 us':>12}")
+        for name, row in results.items():
+            if isinstance(row, dict):
+                print(f"{name:<18}{row['count']:>7}{row['mean_us']:>12.1f}"
+                      f"{row['p50_us']:>12.1f}{row['p99_us']:>12.1f}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
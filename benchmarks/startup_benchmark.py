@@ -0,0 +1,176 @@
+"""
+Startup benchmark for the GUI, with an import-time report.
+
+Import report: runs "python -X importtime" on the modules the login screen
+and the headless subcommands load, and lists the slowest imports. Modules
+that must stay off the login path (tkcalendar and babel) are flagged.
+
+Time to first interactive frame: launches the app in a fresh process over
+a data directory seeded with tasks and reports, in milliseconds since the
+process was started, when the login screen has painted, when the task
+list of a logged-in user first paints, when the task form is built and
+when every task has loaded. The median of several runs is checked against
+STARTUP_BUDGET_MS; the exit status is 1 if any milestone is over budget.
+The frame timings need a display (run under xvfb-run on a headless box).
+
+Usage: python benchmarks/startup_benchmark.py [--runs 5] [--tasks 10000] [--top 15]
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+SRC = os.path.join(ROOT, 'src')
+sys.path.insert(0, SRC)
+
+from ids import new_ids
+from storage import TaskStorage
+
+USERNAME = "startup"
+# Milliseconds from process start by which each milestone should be reached
+STARTUP_BUDGET_MS = {
+    'login_frame': 400,
+    'task_list_frame': 600,
+    'form_ready': 1000,
+}
+# Modules that must not be imported before the task form is built
+LAZY_MODULES = ("tkcalendar", "babel")
+IMPORT_TARGETS = {
+    'login screen': "import gui_components",
+    'subcommands': "import cli",
+}
+
+# Runs in the child process: drive the app and print milestone times as JSON
+CHILD = r"""
+import json, os, sys, time
+start = float(os.environ['STARTUP_T0'])
+def now():
+    return round((time.time() - start) * 1000, 1)
+sys.path.insert(0, os.environ['STARTUP_ROOT'])
+import main
+times = {}
+app = main.ToDoApp()
+app.root.update()
+times['login_frame'] = now()
+app.on_login_success(os.environ['STARTUP_USER'])
+window = app.task_manager
+window.task_tree.bind('<Expose>', lambda e: times.setdefault('task_list_frame', now()), add='+')
+deadline = time.time() + 120
+while time.time() < deadline:
+    app.root.update()
+    if window.due_date_entry is not None:
+        times.setdefault('form_ready', now())
+    if not window.loading:
+        times.setdefault('tasks_loaded', now())
+        if 'form_ready' in times and 'task_list_frame' in times:
+            break
+    time.sleep(0.001)
+app.on_close()
+print(json.dumps(times))
+"""
+
+
+def import_report(statement, top):
+    """
+    Run statement under -X importtime. Returns the total in ms, the slowest
+    imports as (cumulative ms, self ms, module) and every imported module name.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import sys; sys.path.insert(0, {SRC!r}); {statement}"],
+        capture_output=True, text=True, cwd=ROOT
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative) / 1000, int(own) / 1000, name.rstrip()))
+    # Top-level imports (no indentation) add up to the total
+    total = sum(cumulative for cumulative, _, name in rows if not name.startswith("  "))
+    return total, sorted(rows, reverse=True)[:top], [name.strip() for _, _, name in rows]
+
+
+def seed(data_dir, size):
+    """Write a user file with size synthetic tasks"""
+    tasks = [
+        {'id': task_id, 'name': f"Startup task {i}", 'priority': "Low", 'due_date': "2026-06-01",
+         'category': "Work", 'status': "Pending", 'created_at': "2026-01-01 09:00:00"}
+        for i, task_id in enumerate(new_ids(size))
+    ]
+    TaskStorage(data_dir, journal=True).save_tasks(USERNAME, tasks)
+
+
+def frame_times(data_dir):
+    """Launch the app once and return its milestone times"""
+    env = dict(os.environ, STARTUP_T0=repr(time.time()), STARTUP_ROOT=ROOT, STARTUP_USER=USERNAME)
+    result = subprocess.run([sys.executable, "-c", CHILD], capture_output=True, text=True,
+                            cwd=os.path.dirname(data_dir), env=env)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure GUI startup time and import cost")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    over_budget = False
+    for label, statement in IMPORT_TARGETS.items():
+        try:
+            total, slowest, modules = import_report(statement, args.top)
+        except RuntimeError as e:
+            print(f"Import report for the {label} failed: {e}")
+            continue
+        print(f"Imports for the {label}: {total:.1f} ms")
+        print(f"  {'cumulative ms':>14} {'self ms':>8}  module")
+        for cumulative, own, name in slowest:
+            print(f"  {cumulative:>14.1f} {own:>8.1f}  {name}")
+        eager = sorted({name for name in modules if name.split(".")[0] in LAZY_MODULES})
+        if eager:
+            over_budget = True
+            print(f"  imported too early: {', '.join(eager)}")
+        print()
+
+    work_dir = tempfile.mkdtemp(prefix="startup_")
+    data_dir = os.path.join(work_dir, "data")
+    try:
+        seed(data_dir, args.tasks)
+        runs = []
+        for _ in range(args.runs):
+            try:
+                runs.append(frame_times(data_dir))
+            except RuntimeError as e:
+                print(f"Could not start the GUI: {e}")
+                print("The frame timings need a display; try xvfb-run.")
+                return 1
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"Time to first interactive frame, {args.tasks} tasks, median of {args.runs} runs:")
+    print(f"  {'milestone':16} {'ms':>8} {'budget':>8}")
+    for milestone in ('login_frame', 'task_list_frame', 'form_ready', 'tasks_loaded'):
+        values = [run[milestone] for run in runs if milestone in run]
+        if not values:
+            continue
+        median = statistics.median(values)
+        budget = STARTUP_BUDGET_MS.get(milestone)
+        late = budget is not None and median > budget
+        over_budget = over_budget or late
+        print(f"  {milestone:16} {median:>8.1f} {budget if budget is not None else '-':>8}"
+              f"{'  OVER BUDGET' if late else ''}")
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
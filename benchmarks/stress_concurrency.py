@@ -0,0 +1,117 @@
+"""
+Multi-process stress test for a shared data directory.
+
+Starts N worker processes that hammer one user's task file at the same time:
+each adds its own tasks one by one, renames some of them, and every so often
+does a full load/modify/save round trip, which exercises the stale-save merge.
+Afterwards the file must parse and hold exactly the final state every worker
+expects for its own tasks - no lost updates and no truncated JSON.
+
+Usage: python benchmarks/stress_concurrency.py [--workers 8] [--ops 200]
+                                               [--mode journal|snapshot|both]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from storage import TaskStorage
+
+USERNAME = "shared"
+
+
+def worker(data_dir, journal, number, ops, results):
+    """Run one worker's mix of single-task writes and full saves"""
+    # Small threshold so journal compaction also races with the other workers
+    storage = TaskStorage(data_dir, journal=journal, compact_threshold=16 * 1024)
+    expected = {}
+    rejected = 0
+    for i in range(ops):
+        task_id = f"w{number}-{i}"
+        task = {'id': task_id, 'name': f"worker {number} task {i}", 'priority': "Low",
+                'due_date': "", 'category': "Work", 'status': "Pending",
+                'created_at': "2026-01-01 00:00:00"}
+        storage.put_task(USERNAME, task)
+        expected[task_id] = (task['name'], "Pending")
+
+        if i % 10 == 9:
+            renamed = dict(task, name=f"worker {number} task {i} renamed")
+            storage.put_task(USERNAME, renamed)
+            expected[task_id] = (renamed['name'], "Pending")
+
+        if i % 25 == 24:
+            tasks = storage.load_tasks(USERNAME)
+            for stored in tasks:
+                if stored['id'] == task_id:
+                    stored['status'] = "Completed"
+            if storage.save_tasks(USERNAME, tasks):
+                expected[task_id] = (expected[task_id][0], "Completed")
+            else:
+                rejected += 1
+    storage.wait_for_compaction()
+    results.put((number, expected, rejected))
+
+
+def run(journal, workers, ops):
+    """Run one stress round; returns a list of problems found"""
+    data_dir = tempfile.mkdtemp(prefix="todo-stress-")
+    try:
+        results = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(target=worker, args=(data_dir, journal, n, ops, results))
+            for n in range(workers)
+        ]
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        reports = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+
+        problems = []
+        with open(os.path.join(data_dir, f"{USERNAME}_tasks.json"), 'r', encoding='utf-8') as f:
+            json.load(f)
+        stored = {t['id']: t for t in TaskStorage(data_dir, journal=journal).load_tasks(USERNAME)}
+        rejected = 0
+        for number, expected, worker_rejected in reports:
+            rejected += worker_rejected
+            for task_id, state in expected.items():
+                if task_id not in stored:
+                    problems.append(f"lost task {task_id}")
+                elif (stored[task_id]['name'], stored[task_id]['status']) != state:
+                    found = (stored[task_id]['name'], stored[task_id]['status'])
+                    problems.append(f"lost update to {task_id}: {found} != {state}")
+        total_writes = workers * ops
+        print(f"{'journal' if journal else 'snapshot'}: {workers} workers x {ops} tasks, "
+              f"{len(stored)} stored, {rejected} stale saves rejected, "
+              f"{total_writes / elapsed:.0f} tasks/s, {len(problems)} problems")
+        return problems
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stress concurrent access to one task file")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--ops", type=int, default=200)
+    parser.add_argument("--mode", choices=["journal", "snapshot", "both"], default="both")
+    args = parser.parse_args()
+
+    modes = {"journal": [True], "snapshot": [False], "both": [True, False]}[args.mode]
+    problems = []
+    for journal in modes:
+        problems += run(journal, args.workers, args.ops)
+    for problem in problems[:20]:
+        print("  " + problem)
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Columnar task layout measured by memory_benchmark.py.
+
+Tasks are kept as parallel typed arrays with string columns deduplicated
+through a StringTable; the application itself keeps slotted Task objects.
+"""
+from array import array
+
+from storage import (
+    Task,
+    date_to_ordinal,
+    ordinal_to_date,
+    timestamp_to_seconds,
+    seconds_to_timestamp,
+)
+
+# Marker stored in a date column when the original value had to be kept verbatim
+RAW_VALUE = -1
+
+
+class StringTable:
+    """Maps a small set of repeated strings to integer codes"""
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def code(self, value):
+        """Return the code for value, adding it if new"""
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+    def value(self, code):
+        """Return the string for a code"""
+        return self.values[code]
+
+
+class TaskTable:
+    """
+    Column-oriented task store for large task sets.
+
+    Each field is kept in its own column: ids and names as lists of strings,
+    priority, category and status as 16-bit codes into a StringTable, the due
+    date as a date ordinal and created_at as seconds since 0001-01-01, both in
+    typed arrays. A row costs a few dozen bytes plus its two strings, instead
+    of a full object with seven string attributes.
+    """
+    def __init__(self):
+        self.ids = []
+        self.names = []
+        self.priority_strings = StringTable()
+        self.category_strings = StringTable()
+        self.status_strings = StringTable()
+        self.priorities = array('H')
+        self.categories = array('H')
+        self.statuses = array('H')
+        self.due_dates = array('l')
+        self.created = array('q')
+        # (column, row) -> original string for dates that didn't parse
+        self.raw = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        for row in range(len(self.ids)):
+            yield self.row(row)
+
+    def append(self, data):
+        """Append a task dictionary as a new row"""
+        row = len(self.ids)
+        self.ids.append(data.get('id'))
+        self.names.append(data.get('name', ''))
+        self.priorities.append(self.priority_strings.code(data.get('priority', 'Low')))
+        self.categories.append(self.category_strings.code(data.get('category', 'Personal')))
+        self.statuses.append(self.status_strings.code(data.get('status', 'Pending')))
+
+        due = data.get('due_date', '')
+        ordinal = date_to_ordinal(due)
+        if ordinal is None:
+            self.raw[('due_date', row)] = str(due)
+            ordinal = RAW_VALUE
+        self.due_dates.append(ordinal)
+
+        created_at = data.get('created_at')
+        seconds = timestamp_to_seconds(created_at)
+        if seconds is None:
+            self.raw[('created_at', row)] = created_at
+            seconds = RAW_VALUE
+        self.created.append(seconds)
+        return row
+
+    def append_task(self, task):
+        """Append a Task object as a new row"""
+        return self.append(task.to_dict())
+
+    def row(self, row):
+        """Return one row as a task dictionary"""
+        due = self.due_dates[row]
+        created = self.created[row]
+        return {
+            'id': self.ids[row],
+            'name': self.names[row],
+            'priority': self.priority_strings.value(self.priorities[row]),
+            'due_date': self.raw[('due_date', row)] if due == RAW_VALUE else ordinal_to_date(due),
+            'category': self.category_strings.value(self.categories[row]),
+            'status': self.status_strings.value(self.statuses[row]),
+            'created_at': self.raw[('created_at', row)] if created == RAW_VALUE else seconds_to_timestamp(created)
+        }
+
+    def task(self, row):
+        """Return one row as a Task object"""
+        return Task.from_dict(self.row(row))
+
+    def set_status(self, row, status):
+        """Change the status of one row"""
+        self.statuses[row] = self.status_strings.code(status)
+
+    def to_dicts(self):
+        """Convert the whole table to a list of task dictionaries"""
+        return [self.row(row) for row in range(len(self.ids))]
+
+    @staticmethod
+    def from_dicts(task_dicts):
+        """Build a table from task dictionaries"""
+        table = TaskTable()
+        for data in task_dicts:
+            table.append(data)
+        return table
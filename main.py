@@ -1,20 +1,29 @@
-import tkinter as tk
-from tkinter import ttk
+import argparse
 import sys
 import os
 
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
-from src.storage import TaskStorage
-from src.gui_components import LoginWindow, TaskManagerWindow
+# Imported under the same name as src/ modules use, so they share one metrics registry
+import metrics
+# Subcommands never import tkinter; the GUI modules are imported by ToDoApp
+import cli
+
+# Profile entries printed to stderr after a profiled run
+PROFILE_LINES = 30
 
 
 class ToDoApp:
     def __init__(self):
+        import tkinter as tk
+        from src.storage import open_storage
+        from src.background_writer import BackgroundWriter
+        
         self.root = tk.Tk()
         self.root.title("To-Do List Management System")
         self.root.geometry("400x500")
         self.root.resizable(False, False)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
         # Colors
         self.colors = {
@@ -28,7 +37,8 @@ class ToDoApp:
             'white': '#ffffff'
         }
         
-        self.storage = TaskStorage()
+        # Disk writes happen on a background thread so the UI never waits on them
+        self.storage = BackgroundWriter(open_storage(backend=os.environ.get("TODO_STORAGE")))
         self.current_user = None
         
         # Show login
@@ -36,6 +46,7 @@ class ToDoApp:
     
     def show_login(self):
         """Show login window"""
+        from src.gui_components import LoginWindow
         self.login_window = LoginWindow(self.root, self.on_login_success, self.colors)
     
     def on_login_success(self, username):
@@ -46,6 +57,7 @@ class ToDoApp:
     
     def show_task_manager(self):
         """Show task manager"""
+        from src.gui_components import TaskManagerWindow
         self.root.geometry("1000x700")
         self.root.resizable(True, True)
         self.task_manager = TaskManagerWindow(
@@ -58,17 +70,63 @@ class ToDoApp:
     
     def on_logout(self):
         """Handle logout"""
+        # Stops any background loading before waiting for queued writes
         self.task_manager.destroy()
+        self.storage.flush()
+        self.wait_for_compaction()
         self.current_user = None
         self.root.geometry("400x500")
         self.root.resizable(False, False)
         self.show_login()
     
+    def on_close(self):
+        """Write pending changes before the window closes"""
+        self.storage.close()
+        self.wait_for_compaction()
+        self.root.destroy()
+    
+    def wait_for_compaction(self):
+        """Let a background journal compaction finish so it isn't cut off at exit"""
+        if hasattr(self.storage, 'wait_for_compaction'):
+            self.storage.wait_for_compaction()
+    
     def run(self):
         """Start the application"""
         self.root.mainloop()
 
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="To-Do List Management System")
+    parser.add_argument("--metrics", metavar="FILE", default=os.environ.get("TODO_METRICS"),
+                        help="record latencies and I/O counters and write them to FILE as JSON on exit")
+    parser.add_argument("--profile", metavar="FILE", nargs="?", const="",
+                        default=os.environ.get("TODO_PROFILE"),
+                        help="run under cProfile, printing the top entries and saving stats to FILE")
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND",
+                                     help="run headless instead of opening the window")
+    cli.add_commands(commands)
+    args = parser.parse_args(argv)
+    
+    if args.metrics:
+        metrics.enable(args.metrics)
+    if args.command:
+        run = lambda: cli.run(args)
+    else:
+        run = ToDoApp().run
+    if args.profile is None:
+        status = run()
+    else:
+        import cProfile
+        import pstats
+        profiler = cProfile.Profile()
+        status = profiler.runcall(run)
+        if args.profile:
+            profiler.dump_stats(args.profile)
+        pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(PROFILE_LINES)
+    if args.metrics:
+        metrics.dump()
+    return status or 0
+
+
 if __name__ == "__main__":
-    app = ToDoApp()
-    app.run()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
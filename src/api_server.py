@@ -0,0 +1,363 @@
+"""
+Local HTTP/JSON API over the task store, for scripts and other tools.
+
+One asyncio event loop serves every connection (HTTP/1.1 keep-alive). Each
+user's tasks are loaded once into a TaskService and kept in memory, so reads
+never touch the disk; writes go through a BackgroundWriter and reach storage
+in coalesced batches shortly after the response is sent. The server assumes
+it is the only writer for the users it has cached while it runs.
+
+Endpoints (all bodies are JSON):
+    GET    /users/USER/tasks          list; query parameters status, priority,
+                                      category, due_from, due_to (YYYY-MM-DD),
+                                      q (search text), sort (e.g. "priority,-due_date"),
+                                      offset, limit
+    POST   /users/USER/tasks          create {"name", "priority", "due_date", "category"}
+    GET    /users/USER/tasks/ID       get
+    PATCH  /users/USER/tasks/ID       update any of name, priority, due_date, category, status
+    DELETE /users/USER/tasks/ID       delete
+    POST   /users/USER/tasks/bulk     {"action": "update", "ids": [...], "fields": {...}}
+                                      {"action": "complete" | "delete", "ids": [...]}
+                                      {"action": "create", "tasks": [{...}, ...]}
+    GET    /users/USER/stats          counters
+
+Command line:
+    python src/api_server.py [--host 127.0.0.1] [--port 8765] [--data-dir DIR]
+"""
+import argparse
+import asyncio
+import json
+import re
+import sys
+from itertools import islice
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import metrics
+from background_writer import BackgroundWriter
+from storage import date_to_ordinal, open_storage
+from task_service import TaskService
+from task_query import TaskQuery
+from task_sort import PRIORITY_RANK, STATUS_RANK, parse_order
+from transfer import tasks_from_rows
+
+DEFAULT_PORT = 8765
+# Tasks per page when the request doesn't say, and the most it may ask for
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Largest request body accepted, in bytes
+MAX_BODY = 16 * 1024 * 1024
+# Usernames end up in file names, so only plain names are served
+USERNAME_PATTERN = re.compile(r"[A-Za-z0-9_-][A-Za-z0-9_.-]{2,63}")
+TASK_FIELDS = ('name', 'priority', 'due_date', 'category', 'status')
+REASONS = {
+    200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+    405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error",
+}
+
+
+class HttpError(Exception):
+    """An error response with a status code and message"""
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def check_fields(body, allowed, required=()):
+    """Validate a JSON object of task fields and return it"""
+    if not isinstance(body, dict):
+        raise ValueError("Expected a JSON object of task fields")
+    for field in required:
+        if not str(body.get(field) or "").strip():
+            raise ValueError(f"{field} is required")
+    for field, value in body.items():
+        if field not in allowed:
+            raise ValueError(f"Unknown field: {field}")
+        if not isinstance(value, str):
+            raise ValueError(f"{field} must be a string")
+    if 'priority' in body and body['priority'] not in PRIORITY_RANK:
+        raise ValueError(f"priority must be one of {', '.join(PRIORITY_RANK)}")
+    if 'status' in body and body['status'] not in STATUS_RANK:
+        raise ValueError(f"status must be one of {', '.join(STATUS_RANK)}")
+    if body.get('due_date') and not date_to_ordinal(body['due_date']):
+        raise ValueError("due_date must be YYYY-MM-DD")
+    return body
+
+
+def _int_param(params, name, default, maximum=None):
+    """A non-negative integer query parameter"""
+    value = params.get(name, default)
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be an integer")
+    if value < 0:
+        raise ValueError(f"{name} must not be negative")
+    return min(value, maximum) if maximum is not None else value
+
+
+def _date_param(params, name):
+    """A YYYY-MM-DD query parameter as a date ordinal, or None"""
+    value = params.get(name)
+    if not value:
+        return None
+    ordinal = date_to_ordinal(value)
+    if not ordinal:
+        raise ValueError(f"{name} must be YYYY-MM-DD")
+    return ordinal
+
+
+class TaskApiServer:
+    """
+    Serves the task API for every user in one data directory.
+
+    storage is wrapped in a BackgroundWriter for write-behind persistence;
+    close() flushes it.
+    """
+    def __init__(self, storage, host="127.0.0.1", port=DEFAULT_PORT):
+        self.storage = BackgroundWriter(storage)
+        self.host = host
+        self.port = port
+        self.services = {}
+        self._loading = {}
+        self._server = None
+
+    async def start(self):
+        """Start listening; returns the bound (host, port)"""
+        self._server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self):
+        """Listen and serve until cancelled"""
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def close(self):
+        """Stop listening and write everything still queued"""
+        if self._server is not None:
+            self._server.close()
+        self.storage.close()
+        if hasattr(self.storage, 'wait_for_compaction'):
+            self.storage.wait_for_compaction()
+
+    async def service(self, username):
+        """The cached TaskService of a user, loading it on first use"""
+        service = self.services.get(username)
+        if service is not None:
+            return service
+        if not USERNAME_PATTERN.fullmatch(username):
+            raise HttpError(404, f"Unknown user: {username}")
+        loading = self._loading.get(username)
+        if loading is None:
+            # Loading runs on a worker thread so other users are served meanwhile
+            service = TaskService(self.storage, username)
+            loading = asyncio.get_running_loop().run_in_executor(None, service.load)
+            self._loading[username] = loading
+            try:
+                await loading
+            finally:
+                del self._loading[username]
+            self.services[username] = service
+            return service
+        await loading
+        return self.services[username]
+
+    async def handle_connection(self, reader, writer):
+        """Serve requests on one connection until the client closes it"""
+        try:
+            while True:
+                request = await self.read_request(reader)
+                if request is None:
+                    break
+                method, target, version, headers, body = request
+                status, payload = await self.dispatch(method, target, body)
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection != 'close' and (version == 'HTTP/1.1' or connection == 'keep-alive')
+                writer.write(self.response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except HttpError as e:
+            writer.write(self.response(e.status, {'error': str(e)}, False))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def read_request(self, reader):
+        """Read one request as (method, target, version, headers, body), or None at EOF"""
+        try:
+            line = await reader.readline()
+            if not line.strip():
+                return None
+            try:
+                method, target, version = line.decode('latin-1').split()
+            except ValueError:
+                raise HttpError(400, "Malformed request line")
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode('latin-1').partition(":")
+                headers[name.strip().lower()] = value.strip()
+        except (asyncio.LimitOverrunError, ValueError):
+            raise HttpError(400, "Request line or header too long")
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise HttpError(400, "Bad Content-Length")
+        if length > MAX_BODY:
+            raise HttpError(413, "Request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target, version.upper(), headers, body
+
+    def response(self, status, payload, keep_alive):
+        """Encode a JSON response"""
+        body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        head = (
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        return head.encode('latin-1') + body
+
+    async def dispatch(self, method, target, body):
+        """Route a request and return (status, payload)"""
+        with metrics.timer("api.request"):
+            try:
+                url = urlsplit(target)
+                parts = [unquote(part) for part in url.path.strip("/").split("/")]
+                params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+                data = json.loads(body) if body else None
+                return await self.route(method, parts, params, data)
+            except HttpError as e:
+                return e.status, {'error': str(e)}
+            except KeyError as e:
+                return 404, {'error': f"Unknown task: {e.args[0]}"}
+            except ValueError as e:
+                return 400, {'error': str(e)}
+            except Exception as e:
+                print(f"Error handling {method} {target}: {e}", file=sys.stderr)
+                return 500, {'error': "Internal server error"}
+
+    async def route(self, method, parts, params, data):
+        """Call the handler for a path"""
+        if len(parts) < 3 or parts[0] != "users":
+            raise HttpError(404, "Not found")
+        username, resource, rest = parts[1], parts[2], parts[3:]
+        if resource == "stats" and not rest:
+            self._allow(method, "GET")
+            return 200, (await self.service(username)).stats.summary()
+        if resource != "tasks" or len(rest) > 1:
+            raise HttpError(404, "Not found")
+        service = await self.service(username)
+        if not rest:
+            if method == "GET":
+                return 200, self.list_tasks(service, params)
+            self._allow(method, "POST")
+            fields = check_fields(data, ('name', 'priority', 'due_date', 'category'), required=('name',))
+            task = service.add_task(**fields)
+            return 201, task.to_dict()
+        if rest[0] == "bulk":
+            self._allow(method, "POST")
+            return 200, self.bulk(service, data)
+        task_id = rest[0]
+        if method == "GET":
+            return 200, service.get_task(task_id).to_dict()
+        if method == "PATCH":
+            return 200, service.update_task(task_id, **check_fields(data, TASK_FIELDS)).to_dict()
+        self._allow(method, "DELETE")
+        return 200, service.delete_task(task_id).to_dict()
+
+    def list_tasks(self, service, params):
+        """One page of the tasks matching the query parameters"""
+        offset = _int_param(params, 'offset', 0)
+        limit = _int_param(params, 'limit', PAGE_SIZE, MAX_PAGE_SIZE)
+        order = parse_order(params.get('sort', ""))
+        status, priority, category = params.get('status'), params.get('priority'), params.get('category')
+        first, last = _date_param(params, 'due_from'), _date_param(params, 'due_to')
+        text = params.get('q', "").strip()
+        query = TaskQuery(status=status, priority=priority, category=category,
+                          due_from=first, due_to=last, text=text)
+
+        if not order and query == TaskQuery():
+            tasks = service.tasks
+            page = list(islice(tasks, offset, offset + limit))
+            return self._page(page, len(tasks), offset, limit)
+        # Memoized by the service and patched as tasks change between requests
+        matches = service.view(query, order)
+        return self._page(matches[offset:offset + limit], len(matches), offset, limit)
+
+    def bulk(self, service, data):
+        """Apply one bulk action as a single storage write"""
+        if not isinstance(data, dict):
+            raise ValueError("Expected a JSON object with an action")
+        action = data.get('action')
+        if action == "create":
+            rows = data.get('tasks')
+            if not isinstance(rows, list):
+                raise ValueError("create needs a list of tasks")
+            for row in rows:
+                check_fields(row, TASK_FIELDS + ('id', 'created_at'))
+            tasks = tasks_from_rows(rows)
+            if None in tasks:
+                raise ValueError("Task name is required")
+            added, skipped = service.add_imported(tasks)
+            return {'created': [task.to_dict() for task in added], 'skipped': len(skipped)}
+        ids = data.get('ids')
+        if not isinstance(ids, list):
+            raise ValueError(f"{action} needs a list of ids")
+        if action == "update":
+            fields = check_fields(data.get('fields'), TASK_FIELDS)
+            return {'changed': [task.id for task in service.bulk_update(ids, **fields)]}
+        if action == "complete":
+            return {'changed': [task.id for task in service.complete_tasks(ids)]}
+        if action == "delete":
+            return {'deleted': [task.id for task in service.delete_tasks(ids)]}
+        raise ValueError(f"Unknown bulk action: {action}")
+
+    @staticmethod
+    def _page(tasks, total, offset, limit):
+        """Response body for one page of tasks"""
+        return {'total': total, 'offset': offset, 'limit': limit,
+                'tasks': [task.to_dict() for task in tasks]}
+
+    @staticmethod
+    def _allow(method, allowed):
+        if method != allowed:
+            raise HttpError(405, f"Use {allowed}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the task store as a local HTTP/JSON API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--backend", choices=["json", "binary", "sqlite"])
+    args = parser.parse_args(argv)
+
+    server = TaskApiServer(open_storage(args.data_dir, args.backend), args.host, args.port)
+
+    async def run():
+        host, port = await server.start()
+        print(f"Serving tasks on http://{host}:{port}", flush=True)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+import sys
+import threading
+import time
+
+import metrics
+
+# Seconds to wait after the first queued change so bursts collapse into one write
+COALESCE_DELAY = 0.05
+
+
+class BackgroundWriter:
+    """
+    Write-behind wrapper around a task storage backend.
+
+    save_tasks, put_task, delete_task and apply_changes only queue the change
+    and return immediately; a single daemon thread writes them out. Repeated
+    changes to the same user are coalesced: a full save supersedes everything
+    queued before it, several edits of one task become a single put, and all
+    queued task changes go to storage as one apply_changes batch.
+    Anything else is passed straight through to the wrapped storage.
+    """
+    def __init__(self, storage, delay=COALESCE_DELAY):
+        self.storage = storage
+        self.delay = delay
+        self._pending = {}
+        self._writing = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="task-writer", daemon=True)
+        self._thread.start()
+
+    def __getattr__(self, name):
+        return getattr(self.storage, name)
+
+    def load_tasks(self, username):
+        """Load tasks for a user once their queued writes are on disk"""
+        self.flush(username)
+        return self.storage.load_tasks(username)
+
+    def iter_tasks(self, username, *args, **kwargs):
+        """Stream tasks for a user once their queued writes are on disk"""
+        self.flush(username)
+        return self.storage.iter_tasks(username, *args, **kwargs)
+
+    def save_tasks(self, username, tasks):
+        """Queue a full save of a user's tasks"""
+        with self._cond:
+            self._pending[username] = {'snapshot': list(tasks), 'changes': {}}
+            self._cond.notify_all()
+        return True
+
+    def put_task(self, username, task):
+        """Queue an insert or update of a single task"""
+        return self.apply_changes(username, {task.get('id'): task})
+
+    def delete_task(self, username, task_id):
+        """Queue the deletion of a single task"""
+        return self.apply_changes(username, {task_id: None})
+
+    def apply_changes(self, username, changes):
+        """Queue several task changes (task id -> dict, or None to delete)"""
+        with self._cond:
+            pending = self._pending.setdefault(username, {'snapshot': None, 'changes': {}})
+            pending['changes'].update(changes)
+            self._cond.notify_all()
+        return True
+
+    @metrics.timed("writer.flush")
+    def flush(self, username=None, timeout=None):
+        """Block until queued writes (of one or all users) are written"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._writing or (self._pending if username is None else username in self._pending):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self):
+        """Flush everything and stop the writer thread"""
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def _run(self):
+        """Writer thread: drain the queue in coalesced batches"""
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed and not self._pending:
+                    return
+            # Let a burst of clicks pile up before writing
+            time.sleep(self.delay)
+            with self._cond:
+                batch = self._pending
+                self._pending = {}
+                self._writing += 1
+            try:
+                for username, pending in batch.items():
+                    self._write(username, pending)
+            finally:
+                with self._cond:
+                    self._writing -= 1
+                    self._cond.notify_all()
+
+    @metrics.timed("writer.write")
+    def _write(self, username, pending):
+        """Write one user's coalesced changes"""
+        try:
+            if pending['snapshot'] is not None:
+                by_id = {task.get('id'): task for task in pending['snapshot']}
+                for task_id, task in pending['changes'].items():
+                    if task is None:
+                        by_id.pop(task_id, None)
+                    else:
+                        by_id[task_id] = task
+                self.storage.save_tasks(username, list(by_id.values()))
+                return
+            self.storage.apply_changes(username, pending['changes'])
+        except Exception as e:
+            print(f"Error saving tasks: {e}", file=sys.stderr)
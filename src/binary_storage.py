@@ -0,0 +1,310 @@
+"""
+Compact binary task files, read through mmap.
+
+Layout of <user>_tasks.bin (all integers little-endian):
+
+    header      magic "TDB1", version u16, reserved u16, record count u32,
+                string table offset u64, id index offset u64
+    records     one per task, in list order:
+                    length u32 (of what follows)
+                    priority, category, status codes   3 x u16
+                    due date ordinal                   i32 (0 none, -1 raw)
+                    created_at seconds since 0001-01-01 i64 (-1 raw)
+                    id, name                           u32 length + UTF-8
+                    raw due_date / created_at          only when flagged -1
+    strings     count u32, then u32 length + UTF-8 per string; the codes
+                above index into this table
+    index       record offsets as u64, sorted by task id
+
+Opening a file only reads the header and the string table, so counting
+tasks is O(1) and fetching one task by id is a binary search over the index.
+"""
+import glob
+import mmap
+import os
+import struct
+import sys
+
+from storage import (
+    TaskStorage,
+    write_format,
+    date_to_ordinal,
+    ordinal_to_date,
+    timestamp_to_seconds,
+    seconds_to_timestamp,
+)
+
+MAGIC = b"TDB1"
+VERSION = 1
+RAW_VALUE = -1
+
+HEADER = struct.Struct('<4sHHIQQ')
+LENGTH = struct.Struct('<I')
+FIXED = struct.Struct('<HHHiq')
+OFFSET = struct.Struct('<Q')
+
+
+def _pack_string(value):
+    """Length-prefixed UTF-8 string"""
+    data = str(value).encode('utf-8')
+    return LENGTH.pack(len(data)) + data
+
+
+def write_binary_tasks(f, tasks):
+    """Write task dictionaries to an open binary file in the TDB1 layout"""
+    strings = []
+    codes = {}
+
+    def code(value):
+        if value not in codes:
+            codes[value] = len(strings)
+            strings.append(value)
+        return codes[value]
+
+    f.write(b"\0" * HEADER.size)
+    offsets = []
+    offset = HEADER.size
+    for task in tasks:
+        due = task.get('due_date', '') or ''
+        due_ordinal = date_to_ordinal(due)
+        created_at = task.get('created_at')
+        created = timestamp_to_seconds(created_at)
+        body = [
+            FIXED.pack(
+                code(task.get('priority', 'Low')),
+                code(task.get('category', 'Personal')),
+                code(task.get('status', 'Pending')),
+                RAW_VALUE if due_ordinal is None else due_ordinal,
+                RAW_VALUE if created is None else created
+            ),
+            _pack_string(task.get('id')),
+            _pack_string(task.get('name', '')),
+        ]
+        if due_ordinal is None:
+            body.append(_pack_string(due))
+        if created is None:
+            body.append(_pack_string(created_at if created_at is not None else ""))
+        record = b"".join(body)
+        f.write(LENGTH.pack(len(record)))
+        f.write(record)
+        offsets.append((str(task.get('id')).encode('utf-8'), offset))
+        offset += LENGTH.size + len(record)
+
+    strings_offset = offset
+    f.write(LENGTH.pack(len(strings)))
+    for value in strings:
+        f.write(_pack_string(value))
+
+    index_offset = f.tell()
+    offsets.sort()
+    f.write(b"".join(OFFSET.pack(record_offset) for _, record_offset in offsets))
+
+    f.seek(0)
+    f.write(HEADER.pack(MAGIC, VERSION, 0, len(offsets), strings_offset, index_offset))
+
+
+class BinaryTaskFile:
+    """Read-only, memory-mapped view of one TDB1 task file"""
+    def __init__(self, f):
+        self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, self.count, strings_offset, self.index_offset = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.map.close()
+            raise ValueError("Not a binary task file")
+        self.records_end = strings_offset
+        (string_count,) = LENGTH.unpack_from(self.map, strings_offset)
+        pos = strings_offset + LENGTH.size
+        self.strings = []
+        for _ in range(string_count):
+            value, pos = self._string(pos)
+            self.strings.append(value)
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        pos = HEADER.size
+        while pos < self.records_end:
+            (length,) = LENGTH.unpack_from(self.map, pos)
+            yield self._record(pos + LENGTH.size)
+            pos += LENGTH.size + length
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Release the memory map"""
+        self.map.close()
+
+    def find(self, task_id):
+        """Binary-search the id index; returns the task dictionary or None"""
+        target = str(task_id).encode('utf-8')
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            (offset,) = OFFSET.unpack_from(self.map, self.index_offset + middle * OFFSET.size)
+            key = self._raw_id(offset)
+            if key < target:
+                low = middle + 1
+            elif key > target:
+                high = middle
+            else:
+                return self._record(offset + LENGTH.size)
+        return None
+
+    def _string(self, pos):
+        """Decode the length-prefixed string at pos; returns (value, next pos)"""
+        (length,) = LENGTH.unpack_from(self.map, pos)
+        start = pos + LENGTH.size
+        return self.map[start:start + length].decode('utf-8'), start + length
+
+    def _raw_id(self, offset):
+        """Encoded id of the record starting at offset, without decoding the rest"""
+        pos = offset + LENGTH.size + FIXED.size
+        (length,) = LENGTH.unpack_from(self.map, pos)
+        return self.map[pos + LENGTH.size:pos + LENGTH.size + length]
+
+    def _record(self, pos):
+        """Decode the record body starting at pos"""
+        priority, category, status, due, created = FIXED.unpack_from(self.map, pos)
+        task_id, pos = self._string(pos + FIXED.size)
+        name, pos = self._string(pos)
+        if due == RAW_VALUE:
+            due_date, pos = self._string(pos)
+        else:
+            due_date = ordinal_to_date(due)
+        if created == RAW_VALUE:
+            created_at, pos = self._string(pos)
+        else:
+            created_at = seconds_to_timestamp(created)
+        strings = self.strings
+        return {
+            'id': task_id,
+            'name': name,
+            'priority': strings[priority],
+            'due_date': due_date,
+            'category': strings[category],
+            'status': strings[status],
+            'created_at': created_at
+        }
+
+
+class BinaryTaskStorage(TaskStorage):
+    """
+    TaskStorage that keeps each user's snapshot in the TDB1 binary layout.
+
+    Journaling, compaction and atomic writes work exactly as for JSON files;
+    only the snapshot encoding differs. count_tasks and get_task answer from
+    the memory-mapped file without decoding every task.
+    """
+    def get_user_file(self, username):
+        """Get the file path for a specific user's tasks"""
+        return os.path.join(self.data_dir, f"{username}_tasks.bin")
+
+    def count_tasks(self, username):
+        """Number of tasks for a user"""
+        with self._locked(username, exclusive=False):
+            changes = self._changes(username)
+            f = self._open_snapshot(username)
+            if f is None:
+                return sum(1 for task in changes.values() if task is not None)
+            with f, BinaryTaskFile(f) as reader:
+                count = len(reader)
+                for task_id, task in changes.items():
+                    stored = reader.find(task_id) is not None
+                    count += (task is not None) - stored
+                return count
+
+    def get_task(self, username, task_id):
+        """Fetch one task dictionary by id, or None"""
+        with self._locked(username, exclusive=False):
+            changes = self._changes(username)
+            if task_id in changes:
+                return changes[task_id]
+            f = self._open_snapshot(username)
+            if f is None:
+                return None
+            with f, BinaryTaskFile(f) as reader:
+                return reader.find(task_id)
+
+    def _changes(self, username):
+        """Journal state per task id (empty when not journaling)"""
+        if not self.journal:
+            return {}
+        return self._journal_changes([self._compacting_file(username),
+                                      self.get_journal_file(username)])
+
+    def _read_snapshot(self, username):
+        """Read the full task file"""
+        f = self._open_snapshot(username)
+        if f is None:
+            return []
+        try:
+            with f:
+                return list(self._snapshot_records(f))
+        except Exception as e:
+            print(f"Error loading tasks: {e}", file=sys.stderr)
+            return []
+
+    def _open_snapshot(self, username):
+        """Open the task file for streaming, or return None if there is none"""
+        try:
+            return open(self.get_user_file(username), 'rb')
+        except FileNotFoundError:
+            return None
+
+    def _snapshot_records(self, f):
+        """Iterate over the task dictionaries of an open task file"""
+        try:
+            with BinaryTaskFile(f) as reader:
+                yield from reader
+        except struct.error as e:
+            # Reported like a malformed JSON task file
+            raise ValueError(f"Truncated or corrupt binary task file: {e}") from e
+
+    def _write_file(self, path, tasks):
+        """Write a complete task file to path"""
+        with open(path, 'wb') as f:
+            write_binary_tasks(f, tasks)
+
+
+def _convert(data_dir, source, target, pattern, backend):
+    """Copy every user from source to target storage and switch the data_dir format"""
+    converted = {}
+    for path in sorted(glob.glob(os.path.join(data_dir, pattern))):
+        username = os.path.basename(path)[:-len(pattern) + 1]
+        tasks = source.load_tasks(username)
+        if not target.save_tasks(username, tasks):
+            raise IOError(f"Could not convert tasks for {username}")
+        converted[username] = len(tasks)
+    write_format(data_dir, backend)
+    for username in converted:
+        os.remove(source.get_user_file(username))
+    return converted
+
+
+def convert_json_to_binary(data_dir="data"):
+    """Convert every <user>_tasks.json file in data_dir to the binary format"""
+    return _convert(data_dir, TaskStorage(data_dir, journal=True),
+                    BinaryTaskStorage(data_dir, journal=True), "*_tasks.json", "binary")
+
+
+def convert_binary_to_json(data_dir="data"):
+    """Convert every <user>_tasks.bin file in data_dir back to JSON"""
+    return _convert(data_dir, BinaryTaskStorage(data_dir, journal=True),
+                    TaskStorage(data_dir, journal=True), "*_tasks.bin", "json")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[2] not in ("to-binary", "to-json"):
+        print("Usage: python src/binary_storage.py DATA_DIR to-binary|to-json")
+        sys.exit(2)
+    if sys.argv[2] == "to-binary":
+        result = convert_json_to_binary(sys.argv[1])
+    else:
+        result = convert_binary_to_json(sys.argv[1])
+    for username, count in result.items():
+        print(f"{username}: {count} tasks")
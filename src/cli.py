@@ -0,0 +1,250 @@
+"""
+Headless subcommands for scripts and cron jobs.
+
+Every command works directly on the task storage, streaming the user's
+tasks instead of loading them into a TaskService, and never imports
+tkinter. Results are JSON on stdout: one object per command, or one task
+per line for list (--format json prints a single array instead). Errors go
+to stderr with exit status 1.
+
+    python main.py add NAME [--priority P] [--due YYYY-MM-DD] [--category C] --user USER
+    python main.py list [--status S] [--priority P] [--category C] [--due-from D] [--due-to D]
+                        [--search TEXT] [--sort priority,-due_date] [--offset N] [--limit N]
+                        [--format jsonl|json] --user USER
+    python main.py complete ID [ID ...] --user USER
+    python main.py delete ID [ID ...] --user USER
+    python main.py stats --user USER
+    python main.py import FILE [--format csv|jsonl] --user USER
+    python main.py export FILE [--format csv|jsonl] --user USER
+
+The user defaults to $TODO_USER and the storage backend to $TODO_STORAGE.
+"""
+import json
+import os
+import sys
+
+from search_index import text_matches
+from storage import LOAD_CHUNK_SIZE, Task, date_to_ordinal, open_storage
+from task_collection import TaskStats, name_key
+from task_sort import PRIORITY_RANK, STATUS_RANK, make_sort_key, parse_order, sort_tasks
+from transfer import export_tasks, import_tasks
+
+
+def add_commands(subparsers):
+    """Register the subcommands on an argparse subparsers object"""
+    def command(name, help):
+        parser = subparsers.add_parser(name, help=help)
+        parser.add_argument("--user", default=os.environ.get("TODO_USER"),
+                            help="whose tasks to use (default: $TODO_USER)")
+        parser.add_argument("--data-dir", default="data")
+        parser.add_argument("--backend", choices=["json", "binary", "sqlite"],
+                            default=os.environ.get("TODO_STORAGE"))
+        return parser
+
+    parser = command("add", "add a task and print it")
+    parser.add_argument("name")
+    parser.add_argument("--priority", choices=list(PRIORITY_RANK), default="Low")
+    parser.add_argument("--due", default="", help="due date as YYYY-MM-DD")
+    parser.add_argument("--category", default="Personal")
+
+    parser = command("list", "print tasks matching every given filter")
+    parser.add_argument("--status", choices=list(STATUS_RANK))
+    parser.add_argument("--priority", choices=list(PRIORITY_RANK))
+    parser.add_argument("--category")
+    parser.add_argument("--due-from", help="earliest due date, YYYY-MM-DD")
+    parser.add_argument("--due-to", help="latest due date, YYYY-MM-DD")
+    parser.add_argument("--search", help="words to find in names and categories")
+    parser.add_argument("--sort", default="", help='columns like "priority,-due_date"')
+    parser.add_argument("--offset", type=int, default=0)
+    parser.add_argument("--limit", type=int)
+    parser.add_argument("--format", choices=["jsonl", "json"], default="jsonl")
+
+    for name, help in (("complete", "mark tasks completed"), ("delete", "delete tasks")):
+        parser = command(name, help)
+        parser.add_argument("ids", nargs="+", metavar="ID")
+
+    command("stats", "print task counters")
+
+    for name, help in (("import", "import tasks from a CSV or JSON Lines file"),
+                       ("export", "export tasks to a CSV or JSON Lines file")):
+        parser = command(name, help)
+        parser.add_argument("path", metavar="FILE")
+        parser.add_argument("--format", choices=["csv", "jsonl"])
+
+
+def run(args):
+    """Run a parsed subcommand; returns the exit status"""
+    try:
+        if not args.user or len(args.user.strip()) < 3:
+            raise ValueError("A username of at least 3 characters is required (--user or $TODO_USER)")
+        storage = open_storage(args.data_dir, args.backend)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    try:
+        result = HANDLERS[args.command](storage, args.user.strip(), args)
+        if result is not None:
+            print(json.dumps(result, ensure_ascii=False))
+        return 0
+    except (ValueError, KeyError, IOError) as e:
+        message = f"Unknown task: {e.args[0]}" if isinstance(e, KeyError) else str(e)
+        print(f"Error: {message}", file=sys.stderr)
+        return 1
+    finally:
+        if hasattr(storage, 'wait_for_compaction'):
+            storage.wait_for_compaction()
+        else:
+            storage.close()
+
+
+def _stored(storage, username):
+    """Stream a user's stored task dictionaries"""
+    for chunk in storage.iter_tasks(username, LOAD_CHUNK_SIZE):
+        yield from chunk
+
+
+def _due_ordinal(value, option):
+    """A YYYY-MM-DD option as a date ordinal, or None if not given"""
+    if not value:
+        return None
+    ordinal = date_to_ordinal(value)
+    if not ordinal:
+        raise ValueError(f"{option} must be YYYY-MM-DD")
+    return ordinal
+
+
+def _write(storage, username, changes):
+    """Apply changes to storage or raise IOError"""
+    if changes and not storage.apply_changes(username, changes):
+        raise IOError(f"Could not save tasks for {username}")
+
+
+def add(storage, username, args):
+    """Add one task, keeping names unique ignoring case"""
+    name = args.name.strip()
+    if not name:
+        raise ValueError("Please enter a task name")
+    _due_ordinal(args.due, "--due")
+    key = name_key(name)
+    if any(name_key(task.get('name', '')) == key for task in _stored(storage, username)):
+        raise ValueError("A task with this name already exists")
+    task = Task(name, args.priority, args.due, args.category).to_dict()
+    _write(storage, username, {task['id']: task})
+    return task
+
+
+def list_tasks(storage, username, args):
+    """Print the matching tasks; stops reading early when unsorted and limited"""
+    if args.offset < 0 or (args.limit is not None and args.limit < 0):
+        raise ValueError("--offset and --limit must not be negative")
+    first = _due_ordinal(args.due_from, "--due-from")
+    last = _due_ordinal(args.due_to, "--due-to")
+    order = parse_order(args.sort)
+    dated = first is not None or last is not None
+    first = first or 1
+    last = last or float('inf')
+    end = None if args.limit is None or order else args.offset + args.limit
+
+    # SQLite answers the column filters from its indexes; only the search text is left to match here
+    indexed = hasattr(storage, 'query_tasks')
+
+    def wanted(task):
+        if not indexed:
+            if args.status is not None and task.get('status') != args.status:
+                return False
+            if args.priority is not None and task.get('priority') != args.priority:
+                return False
+            if args.category is not None and task.get('category') != args.category:
+                return False
+            if dated and not first <= (date_to_ordinal(task.get('due_date')) or 0) <= last:
+                return False
+        return not args.search or text_matches(args.search, f"{task.get('name', '')} {task.get('category', '')}")
+
+    if indexed:
+        candidates = storage.query_tasks(username, args.status, args.category, args.priority,
+                                         args.due_from or None, args.due_to or None,
+                                         limit=None if args.search else end)
+    else:
+        candidates = _stored(storage, username)
+    matches = []
+    for task in candidates:
+        if wanted(task):
+            matches.append(task)
+            if end is not None and len(matches) >= end:
+                break
+
+    if order:
+        tasks = [Task.from_dict(task) for task in matches]
+        keys = {task.id: make_sort_key(task, position) for position, task in enumerate(tasks)}
+        matches = [task.to_dict() for task in sort_tasks(tasks, order, lambda task: keys[task.id])]
+    matches = matches[args.offset:None if args.limit is None else args.offset + args.limit]
+
+    if args.format == "json":
+        return matches
+    sys.stdout.writelines(json.dumps(task, ensure_ascii=False) + "\n" for task in matches)
+    return None
+
+
+def _change_each(storage, username, task_ids, change):
+    """
+    Apply change (task dict -> new dict, or None to delete; False to leave
+    it) to each given task in one write. Every id must exist. Returns the
+    ids that changed.
+    """
+    wanted = set(task_ids)
+    found = {}
+    for task in _stored(storage, username):
+        if task.get('id') in wanted:
+            found[task['id']] = task
+    for task_id in task_ids:
+        if task_id not in found:
+            raise KeyError(task_id)
+    changes = {}
+    for task_id in dict.fromkeys(task_ids):
+        new = change(found[task_id])
+        if new is not False:
+            changes[task_id] = new
+    _write(storage, username, changes)
+    return list(changes)
+
+
+def complete(storage, username, args):
+    """Mark tasks completed; reports those that weren't already"""
+    def mark(task):
+        return False if task.get('status') == "Completed" else dict(task, status="Completed")
+    return {'changed': _change_each(storage, username, args.ids, mark)}
+
+
+def delete(storage, username, args):
+    """Delete tasks"""
+    return {'deleted': _change_each(storage, username, args.ids, lambda task: None)}
+
+
+def stats(storage, username, args):
+    """Counters over all of the user's tasks"""
+    counters = TaskStats()
+    for task in _stored(storage, username):
+        counters.add(Task.from_dict(task))
+    return counters.summary()
+
+
+def import_file(storage, username, args):
+    """Import tasks from a file, skipping names and ids that already exist"""
+    imported, skipped = import_tasks(storage, username, args.path, args.format)
+    return {'imported': imported, 'skipped': skipped}
+
+
+def export_file(storage, username, args):
+    """Export all tasks to a file"""
+    return {'exported': export_tasks(storage, username, args.path, args.format)}
+
+
+HANDLERS = {
+    "add": add,
+    "list": list_tasks,
+    "complete": complete,
+    "delete": delete,
+    "stats": stats,
+    "import": import_file,
+    "export": export_file,
+}
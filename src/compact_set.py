@@ -0,0 +1,79 @@
+"""
+Memory-compact set of strings for streaming passes over many tasks.
+
+Members are stored as 64-bit BLAKE2b hashes in one open-addressing array,
+about 16-32 bytes per member instead of a Python string object each. Two
+strings with the same hash count as the same member; at 64 bits that is
+vanishingly rare (about n**2 / 2**65 for n members) and can only make a new
+string look present. Hashes don't depend on the process, so every process
+reading the same data makes the same decisions.
+"""
+from array import array
+from hashlib import blake2b
+
+# Grow the table once it is more than half full
+MAX_LOAD = 0.5
+
+
+def string_hash(value):
+    """Stable 64-bit hash of a string, never 0 (0 marks an empty slot)"""
+    return int.from_bytes(blake2b(value.encode('utf-8', 'surrogatepass'), digest_size=8).digest(),
+                          'little') or 1
+
+
+class CompactSet:
+    """Set of strings held as 64-bit hashes in a typed array"""
+    def __init__(self, values=(), capacity=1024):
+        size = 1
+        while size < capacity:
+            size *= 2
+        self._slots = array('Q', bytes(8 * size))
+        self._mask = size - 1
+        self._count = 0
+        for value in values:
+            self.add(value)
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, value):
+        slots, mask = self._slots, self._mask
+        key = string_hash(value)
+        i = key & mask
+        while True:
+            slot = slots[i]
+            if slot == key:
+                return True
+            if not slot:
+                return False
+            i = (i + 1) & mask
+
+    def add(self, value):
+        """Add a string; returns False if it was already a member"""
+        key = string_hash(value)
+        slots, mask = self._slots, self._mask
+        i = key & mask
+        while True:
+            slot = slots[i]
+            if slot == key:
+                return False
+            if not slot:
+                break
+            i = (i + 1) & mask
+        slots[i] = key
+        self._count += 1
+        if self._count > MAX_LOAD * len(slots):
+            self._grow()
+        return True
+
+    def _grow(self):
+        """Double the table and re-insert every hash"""
+        old = self._slots
+        slots = self._slots = array('Q', bytes(16 * len(old)))
+        mask = self._mask = len(slots) - 1
+        for key in old:
+            if key:
+                i = key & mask
+                while slots[i]:
+                    i = (i + 1) & mask
+                slots[i] = key
@@ -1,8 +1,73 @@
+import queue
+import threading
+import time
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 from datetime import datetime
-from tkcalendar import DateEntry
-from storage import Task
+import metrics
+from storage import LOAD_CHUNK_SIZE
+from task_service import FILTERS, DUE_FILTERS, TaskService
+from reminders import ReminderScheduler
+from task_sort import SORT_COLUMNS, sort_tasks
+from transfer import read_task_chunks, export_tasks
+
+# Above this many rows the task list only materializes the visible window
+VIRTUAL_LIST_THRESHOLD = 2000
+# Extra rows rendered below the visible window
+VIRTUAL_LIST_BUFFER = 5
+# Milliseconds of typing pause before the search box re-filters the list
+SEARCH_DELAY = 150
+# Most task names listed in one reminder popup
+REMINDER_LIMIT = 10
+# Milliseconds between checks for loaded chunks, and seconds of each tick spent adding them
+LOAD_POLL_DELAY = 10
+LOAD_TICK_BUDGET = 0.03
+# Chunks the loading thread may read ahead of the Tk loop
+LOAD_QUEUE_SIZE = 8
+# Milliseconds between checks for import/export progress
+TRANSFER_POLL_DELAY = 50
+# Chunks the import thread may read ahead of the Tk loop
+TRANSFER_QUEUE_SIZE = 4
+# Milliseconds between refreshes of the debug metrics panel
+DEBUG_PANEL_DELAY = 1000
+TRANSFER_FILETYPES = [("CSV files", "*.csv"), ("JSON Lines files", "*.jsonl"), ("All files", "*.*")]
+COLUMN_TITLES = {
+    "Name": "Task Name",
+    "Priority": "Priority",
+    "Due Date": "Due Date",
+    "Category": "Category",
+    "Status": "Status",
+}
+
+
+def start_worker(work, maxsize, name):
+    """
+    Run work(put, cancel) on a daemon thread.
+
+    put(message) hands a message to the Tk side through a bounded queue,
+    waiting while it is full so a fast producer can't run ahead; it gives up
+    once cancel is set. An exception from work arrives as ('error', e).
+    Returns the queue and the cancel event.
+    """
+    messages = queue.Queue(maxsize=maxsize)
+    cancel = threading.Event()
+    
+    def put(message):
+        while not cancel.is_set():
+            try:
+                messages.put(message, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+    
+    def run():
+        try:
+            work(put, cancel)
+        except Exception as e:
+            put(('error', e))
+    
+    threading.Thread(target=run, name=name, daemon=True).start()
+    return messages, cancel
 
 
 class LoginWindow:
@@ -141,20 +206,58 @@ class TaskManagerWindow:
         self.storage = storage
         self.colors = colors
         self.on_logout = on_logout
-        self.tasks = []
+        self.service = TaskService(storage, username)
         self.filtered_tasks = []
         self.current_filter = "All"
-        self.selected_task_index = None
         self.filter_buttons = {}
-        
-        # Load tasks
-        self.load_tasks()
+        # Bulk-editable form fields the user has changed since the form was last filled
+        self.edited_fields = set()
+        
+        # Column sort keys, primary first, as (column, descending) pairs
+        self.sort_order = []
+        
+        # Treeview rows keyed by task id, so refreshes can diff instead of rebuild
+        self.row_cache = {}
+        self.row_order = []
+        self.visible_tasks = {}
+        
+        # Virtual list state: first logical row shown and rows that fit on screen
+        self.virtual = False
+        self.view_offset = 0
+        self.view_rows = 15
+        self.selected_task_id = None
+        
+        # Background loading state
+        self.loading = False
+        self.load_queue = None
+        self.load_cancel = None
+        self.load_job = None
+        self.search_job = None
+        
+        # Import/export worker state
+        self.transfer_queue = None
+        self.transfer_job = None
+        self.transfer_cancel = None
+        self.import_counts = None
+        
+        # The form's contents (and tkcalendar) are built once its panel is first drawn
+        self.form_frame = None
+        self.form_job = None
+        self.due_date_entry = None
+        
+        # Hidden metrics panel (Ctrl+Shift+D)
+        self.debug_panel = None
+        self.debug_text = None
+        self.debug_job = None
+        
+        # Reminders start once every task is loaded
+        self.reminders = ReminderScheduler(parent, lambda: self.tasks, self.show_reminders)
         
         # Create UI
         self.create_ui()
         
-        # Display tasks
-        self.refresh_task_list()
+        # Display tasks as they arrive from a loading thread
+        self.load_tasks()
     
     def create_ui(self):
         """Create the complete UI"""
@@ -177,6 +280,13 @@ class TaskManagerWindow:
         
         # Bottom - Statistics
         self.create_statistics(main_frame)
+        
+        # Undo / redo shortcuts
+        for sequence in ('<Control-z>', '<Control-Z>'):
+            self.parent.bind(sequence, self.undo)
+        for sequence in ('<Control-y>', '<Control-Y>'):
+            self.parent.bind(sequence, self.redo)
+        self.parent.bind('<Control-D>', self.toggle_debug_panel)
     
     def create_header(self, parent):
         """Create header with improved styling"""
@@ -220,12 +330,40 @@ class TaskManagerWindow:
             command=self.on_logout
         )
         logout_btn.pack(side=tk.RIGHT, padx=20, pady=20)
+        
+        # Import / export buttons
+        for text, command in (("Export", self.start_export), ("Import", self.start_import)):
+            tk.Button(
+                header,
+                text=text,
+                font=("Helvetica", 10, "bold"),
+                bg=self.colors['secondary'],
+                fg=self.colors['white'],
+                relief=tk.FLAT,
+                cursor="hand2",
+                command=command
+            ).pack(side=tk.RIGHT, padx=(0, 5), pady=20)
     
     def create_task_form(self, parent):
-        """Create improved task input form"""
+        """Create the task form panel; its widgets are filled in once it is first drawn"""
         form_frame = tk.Frame(parent, bg=self.colors['white'], relief=tk.RAISED, borderwidth=1)
         form_frame.pack(side=tk.LEFT, fill=tk.BOTH, padx=(0, 5), ipadx=10)
         form_frame.config(width=300)
+        self.form_frame = form_frame
+        form_frame.bind('<Expose>', self.on_form_exposed)
+    
+    def on_form_exposed(self, event):
+        """Build the form right after the window's first paint"""
+        self.form_frame.unbind('<Expose>')
+        self.form_job = self.parent.after_idle(self.build_task_form)
+    
+    def build_task_form(self):
+        """Fill in the task form, importing tkcalendar on first use"""
+        # tkcalendar pulls in babel, which is slow to import and not needed before now
+        from tkcalendar import DateEntry
+        
+        self.form_job = None
+        form_frame = self.form_frame
         
         # Form title
         title = tk.Label(
@@ -257,6 +395,7 @@ class TaskManagerWindow:
         ).pack(anchor=tk.W, padx=15, pady=(5, 2))
         
         self.priority_var = tk.StringVar(value="Low")
+        self.priority_var.trace_add('write', lambda *args: self.edited_fields.add('priority'))
         priority_frame = tk.Frame(form_frame, bg=self.colors['white'])
         priority_frame.pack(fill=tk.X, padx=15, pady=(0, 10))
         
@@ -299,6 +438,7 @@ class TaskManagerWindow:
         ).pack(anchor=tk.W, padx=15, pady=(5, 2))
         
         self.category_var = tk.StringVar(value="Personal")
+        self.category_var.trace_add('write', lambda *args: self.edited_fields.add('category'))
         category_combo = ttk.Combobox(
             form_frame,
             textvariable=self.category_var,
@@ -353,6 +493,11 @@ class TaskManagerWindow:
             command=self.clear_form
         )
         clear_btn.pack(fill=tk.X, ipady=8)
+        
+        # A task selected before the form existed
+        task = self.tasks.get(self.selected_task_id) if self.selected_task_id is not None else None
+        if task is not None:
+            self.fill_form(task)
     
     def create_task_list(self, parent):
         """Create improved task list panel"""
@@ -375,8 +520,7 @@ class TaskManagerWindow:
         filter_frame = tk.Frame(header_frame, bg=self.colors['white'])
         filter_frame.pack(side=tk.RIGHT)
         
-        filters = ["All", "Pending", "Completed"]
-        for filter_name in filters:
+        for filter_name in FILTERS:
             btn = tk.Button(
                 filter_frame,
                 text=filter_name,
@@ -392,6 +536,29 @@ class TaskManagerWindow:
             btn.pack(side=tk.LEFT, padx=2)
             self.filter_buttons[filter_name] = btn
         
+        # Live search box, combined with the active filter
+        search_frame = tk.Frame(list_frame, bg=self.colors['white'])
+        search_frame.pack(fill=tk.X, padx=15, pady=(0, 10))
+        
+        tk.Label(
+            search_frame,
+            text="🔍 Search:",
+            font=("Helvetica", 10, "bold"),
+            bg=self.colors['white']
+        ).pack(side=tk.LEFT)
+        
+        self.search_var = tk.StringVar()
+        self.search_entry = tk.Entry(
+            search_frame,
+            textvariable=self.search_var,
+            font=("Helvetica", 10),
+            relief=tk.SOLID,
+            borderwidth=1
+        )
+        self.search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(5, 0), ipady=3)
+        self.search_entry.bind('<Escape>', lambda e: self.search_var.set(""))
+        self.search_var.trace_add('write', self.on_search_changed)
+        
         # Treeview for tasks
         tree_frame = tk.Frame(list_frame, bg=self.colors['white'])
         tree_frame.pack(fill=tk.BOTH, expand=True, padx=15, pady=(0, 10))
@@ -406,22 +573,20 @@ class TaskManagerWindow:
         # Treeview
         self.task_tree = ttk.Treeview(
             tree_frame,
-            columns=("Name", "Priority", "Due Date", "Category", "Status"),
+            columns=SORT_COLUMNS,
             show="headings",
             yscrollcommand=vsb.set,
             xscrollcommand=hsb.set,
+            selectmode="extended",
             height=15
         )
         
+        self.task_vsb = vsb
         vsb.config(command=self.task_tree.yview)
         hsb.config(command=self.task_tree.xview)
         
-        # Define columns
-        self.task_tree.heading("Name", text="Task Name")
-        self.task_tree.heading("Priority", text="Priority")
-        self.task_tree.heading("Due Date", text="Due Date")
-        self.task_tree.heading("Category", text="Category")
-        self.task_tree.heading("Status", text="Status")
+        # Define columns; click a heading to sort, shift-click to add a secondary key
+        self.update_headings()
         
         self.task_tree.column("Name", width=250)
         self.task_tree.column("Priority", width=80)
@@ -438,6 +603,13 @@ class TaskManagerWindow:
         
         # Bind selection event
         self.task_tree.bind('<<TreeviewSelect>>', self.on_task_select)
+        self.task_tree.bind('<Button-1>', self.on_heading_click)
+        
+        # Scrolling events used by the virtual list mode
+        self.task_tree.bind('<Configure>', self.on_tree_resize)
+        self.task_tree.bind('<MouseWheel>', self.on_mouse_wheel)
+        self.task_tree.bind('<Button-4>', self.on_mouse_wheel)
+        self.task_tree.bind('<Button-5>', self.on_mouse_wheel)
         
         # Action buttons with improved layout
         action_frame = tk.Frame(list_frame, bg=self.colors['white'])
@@ -503,175 +675,541 @@ class TaskManagerWindow:
             fg=self.colors['success']
         )
         self.completed_label.pack(side=tk.LEFT, padx=20, pady=15)
+        
+        self.overdue_label = tk.Label(
+            stats_frame,
+            text="Overdue: 0",
+            font=("Helvetica", 11, "bold"),
+            bg=self.colors['dark'],
+            fg=self.colors['danger']
+        )
+        self.overdue_label.pack(side=tk.LEFT, padx=20, pady=15)
+        
+        # Shown only while tasks are loading
+        self.loading_label = tk.Label(
+            stats_frame,
+            text="",
+            font=("Helvetica", 10, "italic"),
+            bg=self.colors['dark'],
+            fg=self.colors['white']
+        )
+        
+        # Import/export progress, shown only while a transfer runs
+        self.transfer_label = tk.Label(
+            stats_frame,
+            text="",
+            font=("Helvetica", 10),
+            bg=self.colors['dark'],
+            fg=self.colors['white']
+        )
+        self.transfer_bar = ttk.Progressbar(stats_frame, length=200, mode='determinate', maximum=1.0)
+    
+    @property
+    def tasks(self):
+        """The user's TaskCollection, owned by the service"""
+        return self.service.tasks
     
     def load_tasks(self):
-        """Load tasks from storage"""
-        task_dicts = self.storage.load_tasks(self.username)
-        self.tasks = [Task.from_dict(task_dict) for task_dict in task_dicts]
-        self.filtered_tasks = self.tasks.copy()
+        """Start reading tasks on a worker thread; chunks are shown as they arrive"""
+        self.service.begin_load()
+        self.filtered_tasks = []
+        self.refresh_task_list()
+        self.loading = True
+        self.loading_label.config(text="Loading tasks...")
+        self.loading_label.pack(side=tk.RIGHT, padx=20, pady=15)
+        
+        def work(put, cancel):
+            chunks = []
+            for chunk in self.service.read_chunks(LOAD_CHUNK_SIZE):
+                if cancel.is_set():
+                    return
+                chunks.append(chunk)
+                put(('chunk', chunk))
+            # Built here so the first search doesn't build it on the Tk thread
+            put(('done', self.service.index_chunks(chunks)))
+        self.load_queue, self.load_cancel = start_worker(work, LOAD_QUEUE_SIZE, "task-loader")
+        self.load_job = self.parent.after(LOAD_POLL_DELAY, self.poll_loading)
+    
+    @metrics.timed("gui.load_tick")
+    def poll_loading(self):
+        """Add the chunks that have arrived, within a time budget, then yield to the event loop"""
+        self.load_job = None
+        deadline = time.perf_counter() + LOAD_TICK_BUDGET
+        added = False
+        while time.perf_counter() < deadline:
+            try:
+                message = self.load_queue.get_nowait()
+            except queue.Empty:
+                break
+            if message[0] != 'chunk':
+                self.finish_loading(message)
+                return
+            self.add_loaded_chunk(message[1])
+            added = True
+        
+        if added:
+            self.refresh_task_list()
+            self.loading_label.config(text=f"Loading tasks... {len(self.tasks)}")
+        self.load_job = self.parent.after(1 if added else LOAD_POLL_DELAY, self.poll_loading)
     
-    def save_tasks(self):
-        """Save tasks to storage"""
-        task_dicts = [task.to_dict() for task in self.tasks]
-        self.storage.save_tasks(self.username, task_dicts)
+    def add_loaded_chunk(self, chunk):
+        """Add a chunk of loaded tasks to the collection and the visible list"""
+        self.service.add_loaded(chunk)
+        # A new list: the rows may be a view shared with the service's cache
+        self.filtered_tasks = self.filtered_tasks + self.service.filter_tasks(
+            self.current_filter, chunk, self.search_text()
+        )
+        if self.sort_order:
+            # Merges the new chunk into the already sorted rows
+            sort_tasks(self.filtered_tasks, self.sort_order, self.tasks.sort_key)
+    
+    def finish_loading(self, message):
+        """Hide the loading indicator once the worker is done"""
+        self.loading = False
+        self.load_queue = None
+        self.load_cancel = None
+        self.loading_label.pack_forget()
+        if message[0] == 'done':
+            self.service.finish_load(message[1])
+        # Chunks were sorted as they arrived; one pass over everything gives the final order
+        self.apply_filter(self.current_filter)
+        if message[0] == 'error':
+            messagebox.showerror("Error", f"Failed to load tasks: {str(message[1])}")
+        self.reminders.start()
     
     def add_task(self):
         """Add a new task"""
+        if self.loading:
+            # Names are only known to be unique once every task has loaded
+            messagebox.showinfo("Info", "Please wait until all tasks are loaded")
+            return
         try:
-            name = self.task_name_entry.get().strip()
-            if not name:
-                messagebox.showerror("Error", "Please enter a task name")
-                return
-            
-            # Check for duplicate task names (case-insensitive)
-            if any(task.name.lower() == name.lower() for task in self.tasks):
-                messagebox.showerror("Error", "A task with this name already exists")
-                return
-            
-            priority = self.priority_var.get()
-            due_date = str(self.due_date_entry.get_date())
-            category = self.category_var.get()
-            
-            task = Task(name, priority, due_date, category)
-            self.tasks.append(task)
-            self.save_tasks()
+            self.service.add_task(
+                self.task_name_entry.get(),
+                self.priority_var.get(),
+                str(self.due_date_entry.get_date()),
+                self.category_var.get()
+            )
+            self.reminders.reschedule()
             self.apply_filter(self.current_filter)
             self.clear_form()
             messagebox.showinfo("Success", "Task added successfully!")
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
         except Exception as e:
             messagebox.showerror("Error", f"Failed to add task: {str(e)}")
     
     def update_task(self):
-        """Update selected task"""
-        selection = self.task_tree.selection()
-        if not selection:
+        """Update selected task, or the priority and category of several"""
+        if self.loading:
+            messagebox.showinfo("Info", "Please wait until all tasks are loaded")
+            return
+        tasks = self.get_selected_tasks()
+        if not tasks:
             messagebox.showerror("Error", "Please select a task to update")
             return
         
-        name = self.task_name_entry.get().strip()
-        if not name:
-            messagebox.showerror("Error", "Please enter a task name")
+        if len(tasks) > 1:
+            # The form shows the first task's values, so only apply what the user changed
+            fields = {}
+            if 'priority' in self.edited_fields:
+                fields['priority'] = self.priority_var.get()
+            if 'category' in self.edited_fields:
+                fields['category'] = self.category_var.get()
+            if not fields:
+                messagebox.showinfo("Update", "Choose a new priority or category to apply to the selected tasks")
+                return
+            try:
+                changed = self.service.bulk_update([task.id for task in tasks], **fields)
+                self.apply_filter(self.current_filter)
+                self.clear_form()
+                messagebox.showinfo("Success", f"{len(changed)} of {len(tasks)} tasks updated")
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to update tasks: {str(e)}")
             return
         
+        task = tasks[0]
         try:
-            item = selection[0]
-            index = self.task_tree.index(item)
-            task = self.filtered_tasks[index]
-            
-            # Check for duplicate task names (excluding current task)
-            if any(t.name.lower() == name.lower() and t.id != task.id for t in self.tasks):
-                messagebox.showerror("Error", "A task with this name already exists")
-                return
-            
-            task.name = name
-            task.priority = self.priority_var.get()
-            task.due_date = str(self.due_date_entry.get_date())
-            task.category = self.category_var.get()
-            
-            self.save_tasks()
-            self.refresh_task_list()
+            self.service.update_task(
+                task.id,
+                name=self.task_name_entry.get(),
+                priority=self.priority_var.get(),
+                due_date=str(self.due_date_entry.get_date()),
+                category=self.category_var.get()
+            )
+            self.reminders.reschedule()
+            self.apply_filter(self.current_filter)
             self.clear_form()
             messagebox.showinfo("Success", "Task updated successfully!")
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
         except Exception as e:
             messagebox.showerror("Error", f"Failed to update task: {str(e)}")
     
     def delete_task(self):
-        """Delete selected task"""
-        selection = self.task_tree.selection()
-        if not selection:
+        """Delete the selected tasks"""
+        tasks = self.get_selected_tasks()
+        if not tasks:
             messagebox.showerror("Error", "Please select a task to delete")
             return
         
-        if messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this task?"):
+        if len(tasks) == 1:
+            question = "Are you sure you want to delete this task?"
+        else:
+            question = f"Are you sure you want to delete these {len(tasks)} tasks?"
+        if messagebox.askyesno("Confirm Delete", question):
             try:
-                item = selection[0]
-                index = self.task_tree.index(item)
-                task = self.filtered_tasks[index]
-                
-                self.tasks.remove(task)
-                self.save_tasks()
+                self.service.delete_tasks([task.id for task in tasks])
+                self.reminders.reschedule()
                 self.apply_filter(self.current_filter)
                 self.clear_form()
-                messagebox.showinfo("Success", "Task deleted successfully!")
+                if len(tasks) == 1:
+                    messagebox.showinfo("Success", "Task deleted successfully!")
+                else:
+                    messagebox.showinfo("Success", f"{len(tasks)} tasks deleted")
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to delete task: {str(e)}")
     
     def mark_complete(self):
-        """Mark selected task as completed"""
-        selection = self.task_tree.selection()
-        if not selection:
+        """Mark the selected tasks as completed"""
+        tasks = self.get_selected_tasks()
+        if not tasks:
             messagebox.showerror("Error", "Please select a task to mark as complete")
             return
         
         try:
-            item = selection[0]
-            index = self.task_tree.index(item)
-            task = self.filtered_tasks[index]
-            
-            if task.status == "Completed":
-                messagebox.showinfo("Info", "Task is already marked as completed")
+            completed = self.service.complete_tasks([task.id for task in tasks])
+            if not completed:
+                if len(tasks) == 1:
+                    messagebox.showinfo("Info", "Task is already marked as completed")
+                else:
+                    messagebox.showinfo("Info", "Tasks are already marked as completed")
                 return
             
-            task.status = "Completed"
-            self.save_tasks()
-            self.refresh_task_list()
-            messagebox.showinfo("Success", "Task marked as completed!")
+            self.reminders.reschedule()
+            self.apply_filter(self.current_filter)
+            if len(tasks) == 1:
+                messagebox.showinfo("Success", "Task marked as completed!")
+            else:
+                messagebox.showinfo("Success", f"{len(completed)} tasks marked as completed")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to mark task as complete: {str(e)}")
     
+    def start_import(self):
+        """Ask for a CSV or JSON Lines file and import it in the background"""
+        if self.transfer_queue is not None:
+            messagebox.showinfo("Info", "An import or export is already running")
+            return
+        if self.loading:
+            messagebox.showinfo("Info", "Please wait until all tasks are loaded")
+            return
+        path = filedialog.askopenfilename(title="Import tasks", filetypes=TRANSFER_FILETYPES)
+        if not path:
+            return
+        self.import_counts = [0, 0]
+        
+        def work(put, cancel):
+            for tasks, invalid, fraction in read_task_chunks(path):
+                if cancel.is_set():
+                    return
+                put(('chunk', tasks, invalid, fraction))
+            put(('done', None))
+        self.start_transfer("Importing...", work)
+    
+    def start_export(self):
+        """Ask for a file name and export all tasks to it in the background"""
+        if self.transfer_queue is not None:
+            messagebox.showinfo("Info", "An import or export is already running")
+            return
+        path = filedialog.asksaveasfilename(
+            title="Export tasks",
+            defaultextension=".csv",
+            filetypes=TRANSFER_FILETYPES
+        )
+        if not path:
+            return
+        total = len(self.tasks)
+        
+        def work(put, cancel):
+            written = export_tasks(self.storage, self.username, path,
+                                   progress=lambda fraction: put(('progress', fraction)),
+                                   total=total, cancel=cancel)
+            put(('done', f"{written} tasks exported"))
+        self.start_transfer("Exporting...", work)
+    
+    def start_transfer(self, text, work):
+        """Run work(put, cancel) on a worker thread and follow its messages from the Tk loop"""
+        self.transfer_label.config(text=text)
+        self.transfer_label.pack(side=tk.RIGHT, padx=(0, 20), pady=15)
+        self.transfer_bar['value'] = 0
+        self.transfer_bar.pack(side=tk.RIGHT, padx=(0, 10), pady=15)
+        self.transfer_queue, self.transfer_cancel = start_worker(work, TRANSFER_QUEUE_SIZE, "task-transfer")
+        self.transfer_job = self.parent.after(TRANSFER_POLL_DELAY, self.poll_transfer)
+    
+    def poll_transfer(self):
+        """Handle at most one imported chunk per tick, then yield to the event loop"""
+        self.transfer_job = None
+        try:
+            message = self.transfer_queue.get_nowait()
+        except queue.Empty:
+            self.transfer_job = self.parent.after(TRANSFER_POLL_DELAY, self.poll_transfer)
+            return
+        
+        kind = message[0]
+        if kind == 'chunk':
+            _, tasks, invalid, fraction = message
+            added, skipped = self.service.add_imported(tasks)
+            self.import_counts[0] += len(added)
+            self.import_counts[1] += len(skipped) + invalid
+            self.transfer_bar['value'] = fraction
+            self.update_statistics()
+        elif kind == 'progress':
+            self.transfer_bar['value'] = message[1]
+        else:
+            self.finish_transfer()
+            if kind == 'error':
+                messagebox.showerror("Error", f"Transfer failed: {str(message[1])}")
+            elif message[1] is not None:
+                messagebox.showinfo("Success", message[1])
+            else:
+                imported, skipped = self.import_counts
+                self.reminders.reschedule()
+                self.apply_filter(self.current_filter)
+                messagebox.showinfo("Success", f"{imported} tasks imported, {skipped} skipped")
+            return
+        self.transfer_job = self.parent.after(1, self.poll_transfer)
+    
+    def finish_transfer(self):
+        """Stop following the worker thread and hide the progress bar"""
+        if self.transfer_job is not None:
+            self.parent.after_cancel(self.transfer_job)
+            self.transfer_job = None
+        if self.transfer_cancel is not None:
+            self.transfer_cancel.set()
+        self.transfer_queue = None
+        self.transfer_cancel = None
+        self.transfer_label.pack_forget()
+        self.transfer_bar.pack_forget()
+    
+    def undo(self, event=None):
+        """Revert the latest edit (Ctrl+Z)"""
+        self.replay_history(self.service.undo, "undo")
+        return "break"
+    
+    def redo(self, event=None):
+        """Reapply the latest undone edit (Ctrl+Y)"""
+        self.replay_history(self.service.redo, "redo")
+        return "break"
+    
+    @metrics.timed("gui.undo_redo")
+    def replay_history(self, step, action):
+        """Run an undo or redo step and show its result"""
+        try:
+            if not step():
+                return
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to {action}: {str(e)}")
+            return
+        self.reminders.reschedule()
+        self.apply_filter(self.current_filter)
+        self.clear_form()
+    
     def on_task_select(self, event):
         """Handle task selection"""
         selection = self.task_tree.selection()
         if selection:
-            item = selection[0]
-            index = self.task_tree.index(item)
-            task = self.filtered_tasks[index]
-            
-            self.task_name_entry.delete(0, tk.END)
-            self.task_name_entry.insert(0, task.name)
-            self.priority_var.set(task.priority)
-            self.category_var.set(task.category)
-            
-            if task.due_date:
-                try:
-                    date_obj = datetime.strptime(task.due_date, '%Y-%m-%d')
-                    self.due_date_entry.set_date(date_obj)
-                except:
-                    pass
+            task = self.visible_tasks[selection[0]]
+            if task.id == self.selected_task_id:
+                # Re-selected after the virtual list scrolled back to it
+                return
+            self.selected_task_id = task.id
+            if self.due_date_entry is not None:
+                # Otherwise build_task_form fills the form once it exists
+                self.fill_form(task)
     
+    def fill_form(self, task):
+        """Show a task's values in the form"""
+        self.task_name_entry.delete(0, tk.END)
+        self.task_name_entry.insert(0, task.name)
+        self.priority_var.set(task.priority)
+        self.category_var.set(task.category)
+        self.edited_fields.clear()
+        
+        if task.due_date:
+            try:
+                date_obj = datetime.strptime(task.due_date, '%Y-%m-%d')
+                self.due_date_entry.set_date(date_obj)
+            except:
+                pass
+    
+    @metrics.timed("gui.refresh_task_list")
     def refresh_task_list(self):
         """Refresh the task list display"""
-        for item in self.task_tree.get_children():
-            self.task_tree.delete(item)
-        
-        for task in self.filtered_tasks:
-            tags = []
-            if task.status == "Completed":
-                tags.append('completed')
-            if task.priority == "High":
-                tags.append('high')
-            elif task.priority == "Medium":
-                tags.append('medium')
-            
-            self.task_tree.insert(
-                "",
-                tk.END,
-                values=(task.name, task.priority, task.due_date, task.category, task.status),
-                tags=tags
-            )
+        virtual = len(self.filtered_tasks) >= VIRTUAL_LIST_THRESHOLD
+        if virtual != self.virtual:
+            self.set_virtual_mode(virtual)
         
+        if self.virtual:
+            self.render_virtual_window()
+        else:
+            self.render_rows(self.filtered_tasks)
         self.update_statistics()
+        if metrics.enabled:
+            # Forces geometry management now so its cost is measured separately
+            with metrics.timer("tk.layout"):
+                self.parent.update_idletasks()
+    
+    @metrics.timed("gui.render_rows")
+    def render_rows(self, tasks):
+        """Reconcile the Treeview with tasks, touching only rows that changed"""
+        metrics.count("gui.rows_rendered", len(tasks))
+        wanted = {str(task.id): task for task in tasks}
+        
+        # Remove rows that are no longer shown
+        stale = [iid for iid in self.row_order if iid not in wanted]
+        if stale:
+            self.task_tree.delete(*stale)
+            for iid in stale:
+                del self.row_cache[iid]
+            self.row_order = [iid for iid in self.row_order if iid in wanted]
+        
+        desired = list(wanted)
+        existing = [iid for iid in desired if iid in self.row_cache]
+        reorder = existing != self.row_order
+        
+        for index, (iid, task) in enumerate(wanted.items()):
+            row = self.task_row(task)
+            cached = self.row_cache.get(iid)
+            if cached is None:
+                self.task_tree.insert("", index, iid=iid, values=row[0], tags=row[1])
+            else:
+                if cached != row:
+                    self.task_tree.item(iid, values=row[0], tags=row[1])
+                if reorder:
+                    self.task_tree.move(iid, "", index)
+            self.row_cache[iid] = row
+        
+        self.row_order = desired
+        self.visible_tasks = wanted
+    
+    def set_virtual_mode(self, enabled):
+        """Switch the scrollbar between the Treeview and the virtual window"""
+        self.virtual = enabled
+        self.view_offset = 0
+        if enabled:
+            self.task_tree.configure(yscrollcommand="")
+            self.task_vsb.config(command=self.on_virtual_scroll)
+        else:
+            self.task_tree.configure(yscrollcommand=self.task_vsb.set)
+            self.task_vsb.config(command=self.task_tree.yview)
+    
+    def render_virtual_window(self):
+        """Materialize only the rows around the current scroll offset"""
+        total = len(self.filtered_tasks)
+        self.view_offset = min(self.view_offset, max(0, total - self.view_rows))
+        end = self.view_offset + self.view_rows + VIRTUAL_LIST_BUFFER
+        self.render_rows(self.filtered_tasks[self.view_offset:end])
+        self.task_tree.yview_moveto(0)
+        
+        # Scrollbar reflects the logical row count, not the materialized rows
+        if total:
+            self.task_vsb.set(self.view_offset / total,
+                              min(1.0, (self.view_offset + self.view_rows) / total))
+        else:
+            self.task_vsb.set(0.0, 1.0)
+        
+        # Restore the selection when its row scrolls back into view
+        iid = str(self.selected_task_id)
+        if iid in self.visible_tasks and iid not in self.task_tree.selection():
+            self.task_tree.selection_set(iid)
+    
+    def scroll_to(self, offset):
+        """Scroll the virtual list so that row offset is at the top"""
+        offset = min(max(0, offset), max(0, len(self.filtered_tasks) - self.view_rows))
+        if offset != self.view_offset:
+            self.view_offset = offset
+            self.render_virtual_window()
+    
+    def on_virtual_scroll(self, action, amount, unit=None):
+        """Scrollbar command in virtual mode"""
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * len(self.filtered_tasks)))
+        else:
+            step = self.view_rows if unit == "pages" else 1
+            self.scroll_to(self.view_offset + int(amount) * step)
+    
+    def on_mouse_wheel(self, event):
+        """Scroll the virtual list with the mouse wheel"""
+        if not self.virtual:
+            return None
+        if event.num == 4 or event.delta > 0:
+            self.scroll_to(self.view_offset - 3)
+        else:
+            self.scroll_to(self.view_offset + 3)
+        return "break"
+    
+    def on_tree_resize(self, event):
+        """Recompute how many rows fit when the Treeview is resized"""
+        row_height = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        rows = max(1, (event.height - row_height) // row_height)
+        if rows != self.view_rows:
+            self.view_rows = rows
+            if self.virtual:
+                self.render_virtual_window()
+    
+    def get_selected_tasks(self):
+        """Return every selected task, in list order"""
+        selection = self.task_tree.selection()
+        if len(selection) > 1:
+            return [self.visible_tasks[iid] for iid in selection]
+        task = self.get_selected_task()
+        return [task] if task is not None else []
+    
+    def get_selected_task(self):
+        """Return the selected task, even if the virtual list scrolled it away"""
+        selection = self.task_tree.selection()
+        if selection:
+            return self.visible_tasks[selection[0]]
+        if self.virtual and self.selected_task_id is not None:
+            return self.tasks.get(self.selected_task_id)
+        return None
+    
+    def task_row(self, task):
+        """Treeview values and tags for a task"""
+        tags = []
+        if task.status == "Completed":
+            tags.append('completed')
+        if task.priority == "High":
+            tags.append('high')
+        elif task.priority == "Medium":
+            tags.append('medium')
+        return (task.name, task.priority, task.due_date, task.category, task.status), tuple(tags)
     
     def update_statistics(self):
         """Update statistics display"""
-        total = len(self.tasks)
-        pending = sum(1 for task in self.tasks if task.status == "Pending")
-        completed = sum(1 for task in self.tasks if task.status == "Completed")
+        stats = self.tasks.stats
+        
+        self.total_label.config(text=f"Total: {stats.total}")
+        self.pending_label.config(text=f"Pending: {stats.by_status['Pending']}")
+        self.completed_label.config(text=f"Completed: {stats.by_status['Completed']}")
+        self.overdue_label.config(text=f"Overdue: {stats.overdue()}")
+    
+    def show_reminders(self, tasks):
+        """Tell the user which tasks have fallen due"""
+        if self.current_filter in DUE_FILTERS:
+            self.apply_filter(self.current_filter)
+        else:
+            self.update_statistics()
         
-        self.total_label.config(text=f"Total: {total}")
-        self.pending_label.config(text=f"Pending: {pending}")
-        self.completed_label.config(text=f"Completed: {completed}")
+        names = "\n".join(f"• {task.name}" for task in tasks[:REMINDER_LIMIT])
+        if len(tasks) > REMINDER_LIMIT:
+            names += f"\n...and {len(tasks) - REMINDER_LIMIT} more"
+        messagebox.showinfo("Reminder", f"Tasks due:\n\n{names}")
     
+    @metrics.timed("gui.apply_filter")
     def apply_filter(self, filter_name):
         """Apply filter to task list with button highlighting"""
         self.current_filter = filter_name
@@ -683,23 +1221,117 @@ class TaskManagerWindow:
             else:
                 btn.config(bg=self.colors['light'], fg=self.colors['dark'])
         
-        if filter_name == "All":
-            self.filtered_tasks = self.tasks.copy()
-        elif filter_name == "Pending":
-            self.filtered_tasks = [task for task in self.tasks if task.status == "Pending"]
-        elif filter_name == "Completed":
-            self.filtered_tasks = [task for task in self.tasks if task.status == "Completed"]
+        self.filtered_tasks = self.service.sorted_tasks(filter_name, self.sort_order, self.search_text())
         
         self.refresh_task_list()
     
+    def on_heading_click(self, event):
+        """Sort by a clicked column heading; shift-click adds or flips a secondary key"""
+        if self.task_tree.identify_region(event.x, event.y) != "heading":
+            return
+        column = self.task_tree.column(self.task_tree.identify_column(event.x), "id")
+        columns = [name for name, _ in self.sort_order]
+        if event.state & 0x0001:
+            if column in columns:
+                index = columns.index(column)
+                self.sort_order[index] = (column, not self.sort_order[index][1])
+            else:
+                self.sort_order.append((column, False))
+        elif columns[:1] == [column]:
+            self.sort_order = [(column, not self.sort_order[0][1])]
+        else:
+            self.sort_order = [(column, False)]
+        self.update_headings()
+        self.apply_filter(self.current_filter)
+    
+    def update_headings(self):
+        """Show the sort direction, and key number for multi-key sorts, in the headings"""
+        marks = {}
+        for number, (column, descending) in enumerate(self.sort_order, 1):
+            arrow = "▼" if descending else "▲"
+            marks[column] = f" {arrow}{number}" if len(self.sort_order) > 1 else f" {arrow}"
+        for column in SORT_COLUMNS:
+            self.task_tree.heading(column, text=COLUMN_TITLES[column] + marks.get(column, ""))
+    
+    def search_text(self):
+        """Current contents of the search box"""
+        search_var = getattr(self, 'search_var', None)
+        return search_var.get() if search_var is not None else ""
+    
+    def on_search_changed(self, *args):
+        """Re-filter shortly after the user stops typing in the search box"""
+        if self.search_job is not None:
+            self.parent.after_cancel(self.search_job)
+        self.search_job = self.parent.after(SEARCH_DELAY, self.run_search)
+    
+    @metrics.timed("gui.search")
+    def run_search(self):
+        """Apply the search box to the current filter"""
+        self.search_job = None
+        self.apply_filter(self.current_filter)
+    
+    def toggle_debug_panel(self, event=None):
+        """Show or hide the metrics panel; opening it starts recording"""
+        if self.debug_panel is not None:
+            self.close_debug_panel()
+            return "break"
+        metrics.enable()
+        self.debug_panel = tk.Toplevel(self.parent)
+        self.debug_panel.title("Metrics")
+        self.debug_panel.protocol("WM_DELETE_WINDOW", self.close_debug_panel)
+        self.debug_text = tk.Text(self.debug_panel, font=('Courier', 9), width=80, height=30)
+        self.debug_text.pack(fill=tk.BOTH, expand=True)
+        self.refresh_debug_panel()
+        return "break"
+    
+    def refresh_debug_panel(self):
+        """Redraw the metrics panel every DEBUG_PANEL_DELAY milliseconds"""
+        self.debug_text.delete("1.0", tk.END)
+        self.debug_text.insert("1.0", metrics.format_snapshot())
+        self.debug_job = self.parent.after(DEBUG_PANEL_DELAY, self.refresh_debug_panel)
+    
+    def close_debug_panel(self):
+        """Hide the metrics panel"""
+        if self.debug_job is not None:
+            self.parent.after_cancel(self.debug_job)
+            self.debug_job = None
+        if self.debug_panel is not None:
+            self.debug_panel.destroy()
+            self.debug_panel = None
+            self.debug_text = None
+    
     def clear_form(self):
         """Clear the form"""
+        self.selected_task_id = None
+        if self.due_date_entry is None:
+            return
         self.task_name_entry.delete(0, tk.END)
         self.priority_var.set("Low")
         self.category_var.set("Personal")
+        self.edited_fields.clear()
         self.due_date_entry.set_date(datetime.now())
     
     def destroy(self):
         """Destroy the task manager window"""
+        if self.load_cancel is not None:
+            self.load_cancel.set()
+        if self.load_job is not None:
+            self.parent.after_cancel(self.load_job)
+            self.load_job = None
+        self.reminders.cancel()
+        if self.form_job is not None:
+            self.parent.after_cancel(self.form_job)
+            self.form_job = None
+        if self.transfer_cancel is not None:
+            self.transfer_cancel.set()
+        if self.transfer_job is not None:
+            self.parent.after_cancel(self.transfer_job)
+            self.transfer_job = None
+        for sequence in ('<Control-z>', '<Control-Z>', '<Control-y>', '<Control-Y>', '<Control-D>'):
+            self.parent.unbind(sequence)
+        self.close_debug_panel()
+        if self.search_job is not None:
+            self.parent.after_cancel(self.search_job)
+            self.search_job = None
         for widget in self.parent.winfo_children():
             widget.destroy()
\ No newline at end of file
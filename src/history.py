@@ -0,0 +1,58 @@
+from collections import deque
+
+# Edits remembered for undo by default
+UNDO_DEPTH = 100
+
+
+def diff_fields(before, after):
+    """Split two task dictionaries into (old values, new values) of the fields that differ"""
+    changed = [field for field in after if before.get(field) != after[field]]
+    return {field: before.get(field) for field in changed}, {field: after[field] for field in changed}
+
+
+class EditHistory:
+    """
+    Undo and redo stacks of compact edit records.
+
+    Each entry is a tuple of (task id, before, after) changes. before and
+    after hold only the fields that changed, the whole task dictionary for
+    a task that was created or deleted, or None where the task didn't exist.
+    Memory therefore grows with the size of the edits, never with the number
+    of tasks, and the oldest entries fall off once depth is reached.
+    """
+    def __init__(self, depth=UNDO_DEPTH):
+        self.undo_stack = deque(maxlen=depth)
+        self.redo_stack = []
+
+    def record(self, changes):
+        """Remember a new edit; this clears the redo stack"""
+        changes = tuple(changes)
+        if changes:
+            self.undo_stack.append(changes)
+            self.redo_stack.clear()
+
+    def can_undo(self):
+        return bool(self.undo_stack)
+
+    def can_redo(self):
+        return bool(self.redo_stack)
+
+    def undo_states(self):
+        """(task id, state) pairs that undo the latest edit, or None"""
+        if not self.undo_stack:
+            return None
+        return [(task_id, before) for task_id, before, _ in reversed(self.undo_stack[-1])]
+
+    def redo_states(self):
+        """(task id, state) pairs that redo the latest undone edit, or None"""
+        if not self.redo_stack:
+            return None
+        return [(task_id, after) for task_id, _, after in self.redo_stack[-1]]
+
+    def undone(self):
+        """Move the latest edit to the redo stack once it has been undone"""
+        self.redo_stack.append(self.undo_stack.pop())
+
+    def redone(self):
+        """Move the latest undone edit back to the undo stack once it has been redone"""
+        self.undo_stack.append(self.redo_stack.pop())
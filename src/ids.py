@@ -0,0 +1,66 @@
+"""
+Task ID generation.
+
+IDs look like 20261018153045123456-00a3f29c4b-0000002a:
+
+* a UTC timestamp prefix in the same %Y%m%d%H%M%S%f layout as the original
+  IDs, so new IDs sort in creation order, also across daylight saving
+  changes (the original IDs used local time, so IDs made just before the
+  switch to UTC may sort among the first hours of new ones),
+* a node part: the process id plus 16 random bits, so processes sharing a
+  data directory (even from different machines) never overlap,
+* a per-process counter, so IDs stay unique within the same microsecond.
+
+The timestamp never goes backwards inside a process, even if the clock does.
+"""
+import itertools
+import os
+import random
+import threading
+import time
+
+
+class IdGenerator:
+    """Monotonic, time-sortable unique ID generator"""
+    def __init__(self):
+        self._reset()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        """Pick a fresh node part and counter (also after fork)"""
+        self._lock = threading.Lock()
+        self._node = f"{os.getpid() & 0xffffff:06x}{random.getrandbits(16):04x}"
+        self._counter = itertools.count()
+        self._last_us = 0
+        self._second = None
+        self._second_prefix = ""
+
+    def _prefix(self):
+        """Timestamp prefix for now, never smaller than the last one issued"""
+        now_us = time.time_ns() // 1000
+        if now_us < self._last_us:
+            now_us = self._last_us
+        self._last_us = now_us
+        second, micro = divmod(now_us, 1000000)
+        if second != self._second:
+            self._second = second
+            self._second_prefix = time.strftime("%Y%m%d%H%M%S", time.gmtime(second))
+        return f"{self._second_prefix}{micro:06d}"
+
+    def new_id(self):
+        """Return one new ID"""
+        with self._lock:
+            return f"{self._prefix()}-{self._node}-{next(self._counter):08x}"
+
+    def new_ids(self, count):
+        """Return count new IDs in one go, for bulk creation"""
+        with self._lock:
+            head = f"{self._prefix()}-{self._node}-"
+            counter = self._counter
+            return [f"{head}{next(counter):08x}" for _ in range(count)]
+
+
+_generator = IdGenerator()
+new_id = _generator.new_id
+new_ids = _generator.new_ids
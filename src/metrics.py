@@ -0,0 +1,184 @@
+"""
+Lightweight instrumentation: latency histograms and counters.
+
+Disabled unless the TODO_METRICS environment variable is set (to the JSON
+file metrics are dumped to on exit) or enable() is called. While disabled,
+@timed functions pay a single flag check, timer() returns a shared no-op
+context manager and count() returns immediately.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+
+enabled = bool(os.environ.get("TODO_METRICS"))
+dump_path = os.environ.get("TODO_METRICS") or None
+
+# Bucket i holds durations below 2**i microseconds
+BUCKETS = 32
+
+_lock = threading.Lock()
+timings = {}
+counters = Counter()
+
+
+class Histogram:
+    """Power-of-two latency histogram with count, total, min and max"""
+    def __init__(self):
+        self.buckets = [0] * BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = 0.0
+
+    def add(self, seconds):
+        """Record one duration"""
+        micros = int(seconds * 1_000_000)
+        self.buckets[min(micros.bit_length(), BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def percentile(self, fraction):
+        """Upper bound in milliseconds of the bucket holding the given fraction of samples"""
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target:
+                return min((2 ** i) / 1000, self.max * 1000)
+        return self.max * 1000
+
+    def summary(self):
+        """Counts and latencies in milliseconds as a plain dictionary"""
+        return {
+            'count': self.count,
+            'total_ms': round(self.total * 1000, 3),
+            'mean_ms': round(self.total * 1000 / self.count, 3) if self.count else 0.0,
+            'min_ms': round((self.min or 0.0) * 1000, 3),
+            'p50_ms': round(self.percentile(0.5), 3),
+            'p95_ms': round(self.percentile(0.95), 3),
+            'p99_ms': round(self.percentile(0.99), 3),
+            'max_ms': round(self.max * 1000, 3),
+        }
+
+
+def enable(path=None):
+    """Start recording; metrics are dumped to path by dump() if given"""
+    global enabled, dump_path
+    enabled = True
+    if path:
+        dump_path = path
+
+
+def disable():
+    """Stop recording"""
+    global enabled
+    enabled = False
+
+
+def reset():
+    """Forget everything recorded so far"""
+    with _lock:
+        timings.clear()
+        counters.clear()
+
+
+def record(name, seconds):
+    """Add one duration to the named histogram"""
+    with _lock:
+        histogram = timings.get(name)
+        if histogram is None:
+            histogram = timings[name] = Histogram()
+        histogram.add(seconds)
+
+
+def count(name, amount=1):
+    """Add to a named counter (bytes, rows, calls...)"""
+    if enabled:
+        with _lock:
+            counters[name] += amount
+
+
+def timed(name):
+    """Decorator recording the latency of every call under name"""
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+@contextmanager
+def _timing(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+class _NoTiming:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_TIMING = _NoTiming()
+
+
+def timer(name):
+    """Context manager recording the latency of a block under name"""
+    return _timing(name) if enabled else _NO_TIMING
+
+
+def snapshot():
+    """Everything recorded so far as a plain dictionary"""
+    with _lock:
+        return {
+            'timings': {name: histogram.summary() for name, histogram in sorted(timings.items())},
+            'counters': dict(sorted(counters.items())),
+        }
+
+
+def dump(path=None):
+    """Write the snapshot as JSON to path (or the configured dump path)"""
+    path = path or dump_path
+    if not path:
+        return False
+    try:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot(), f, indent=4)
+        return True
+    except Exception as e:
+        print(f"Error saving metrics: {e}", file=sys.stderr)
+        return False
+
+
+def format_snapshot():
+    """Human-readable text of the snapshot, for the debug panel"""
+    data = snapshot()
+    lines = [f"{'timing':32} {'count':>7} {'mean':>9} {'p95':>9} {'max':>9}"]
+    for name, summary in data['timings'].items():
+        lines.append(f"{name:32} {summary['count']:>7} {summary['mean_ms']:>8.2f}m "
+                     f"{summary['p95_ms']:>8.2f}m {summary['max_ms']:>8.2f}m")
+    lines.append("")
+    for name, value in data['counters'].items():
+        lines.append(f"{name:32} {value:>12}")
+    return "\n".join(lines)
@@ -0,0 +1,54 @@
+from datetime import date, datetime, time
+
+# Longest single wait; waking at least hourly copes with suspend and clock changes
+MAX_WAIT_MS = 60 * 60 * 1000
+
+
+class ReminderScheduler:
+    """
+    Fires reminders for tasks as they fall due, from one Tk after() timer.
+
+    Instead of polling every task, the scheduler asks the collection's
+    due-date index for the next due date and sleeps until that day starts.
+    Call reschedule() after any change that may move the next due date.
+    """
+    def __init__(self, widget, get_tasks, on_due):
+        self.widget = widget
+        self.get_tasks = get_tasks
+        self.on_due = on_due
+        self.job = None
+        self.last_checked = None
+
+    def start(self, today=None):
+        """Remind about tasks due today, then wait for the next due date"""
+        self.last_checked = (today or date.today()).toordinal() - 1
+        self.check()
+
+    def check(self):
+        """Fire reminders for every day that has begun since the last check"""
+        self.job = None
+        today = date.today().toordinal()
+        if today > self.last_checked:
+            due = self.get_tasks().due_between(self.last_checked + 1, today)
+            self.last_checked = today
+            if due:
+                self.on_due(due)
+        self.reschedule()
+
+    def reschedule(self):
+        """Set the timer for the next due date after the last check"""
+        if self.last_checked is None:
+            return
+        self.cancel()
+        next_due = self.get_tasks().due_index.next_due_after(self.last_checked)
+        if next_due is None:
+            return
+        wake = datetime.combine(date.fromordinal(next_due), time())
+        delay = int((wake - datetime.now()).total_seconds() * 1000) + 1
+        self.job = self.widget.after(max(0, min(delay, MAX_WAIT_MS)), self.check)
+
+    def cancel(self):
+        """Stop the timer"""
+        if self.job is not None:
+            self.widget.after_cancel(self.job)
+            self.job = None
@@ -0,0 +1,127 @@
+from bisect import bisect_left, insort
+
+
+def _words(text):
+    """Casefolded words of a piece of text"""
+    return text.casefold().split()
+
+
+def _trigrams(word):
+    """All three-character substrings of a word"""
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+
+def text_matches(query, text):
+    """Whether text matches every word of query, as SearchIndex.search would match it"""
+    words = set(_words(text))
+    document = " ".join(words)
+    for word in set(_words(query)):
+        if len(word) < 3:
+            if not any(indexed.startswith(word) for indexed in words):
+                return False
+        elif word not in document:
+            return False
+    return True
+
+
+class SearchIndex:
+    """
+    In-memory inverted index for live task search.
+
+    Each document (a task's name and category) is split into casefolded words.
+    Words of three or more characters are looked up through a trigram index
+    and then verified, which gives substring matches; shorter query words
+    match word prefixes through a sorted word list. Every query word must
+    match for a document to be returned.
+    """
+    def __init__(self):
+        self.documents = {}
+        self.trigrams = {}
+        self.words = {}
+        self.sorted_words = []
+
+    def __len__(self):
+        return len(self.documents)
+
+    def add(self, doc_id, text):
+        """Index a document (see add_many for more than a few)"""
+        words = set(_words(text))
+        self.documents[doc_id] = " ".join(sorted(words))
+        for word in words:
+            postings = self.words.get(word)
+            if postings is None:
+                postings = self.words[word] = set()
+                insort(self.sorted_words, word)
+            postings.add(doc_id)
+            for gram in _trigrams(word):
+                self.trigrams.setdefault(gram, set()).add(doc_id)
+
+    def add_many(self, documents):
+        """
+        Index (doc_id, text) pairs in bulk: new words are appended and the
+        word list sorted once at the end, instead of an insort per word
+        """
+        words_index, trigrams = self.words, self.trigrams
+        new_words = []
+        for doc_id, text in documents:
+            words = set(_words(text))
+            self.documents[doc_id] = " ".join(sorted(words))
+            for word in words:
+                postings = words_index.get(word)
+                if postings is None:
+                    postings = words_index[word] = set()
+                    new_words.append(word)
+                postings.add(doc_id)
+                for gram in _trigrams(word):
+                    trigrams.setdefault(gram, set()).add(doc_id)
+        if new_words:
+            self.sorted_words.extend(new_words)
+            self.sorted_words.sort()
+
+    def remove(self, doc_id):
+        """Drop a document from the index"""
+        text = self.documents.pop(doc_id, None)
+        if text is None:
+            return
+        for word in text.split():
+            postings = self.words[word]
+            postings.discard(doc_id)
+            if not postings:
+                del self.words[word]
+                del self.sorted_words[bisect_left(self.sorted_words, word)]
+            for gram in _trigrams(word):
+                postings = self.trigrams.get(gram)
+                if postings is not None:
+                    postings.discard(doc_id)
+                    if not postings:
+                        del self.trigrams[gram]
+
+    def search(self, query):
+        """Return the set of document ids matching every word of query"""
+        result = None
+        for word in sorted(set(_words(query)), key=len, reverse=True):
+            matches = self._match_word(word, result)
+            result = matches if result is None else result & matches
+            if not result:
+                return set()
+        return result if result is not None else set(self.documents)
+
+    def _match_word(self, word, candidates):
+        """Ids whose text contains word (substring), or has a word starting with it"""
+        if len(word) < 3:
+            matches = set()
+            start = bisect_left(self.sorted_words, word)
+            for indexed in self.sorted_words[start:]:
+                if not indexed.startswith(word):
+                    break
+                matches |= self.words[indexed]
+            return matches
+
+        postings = sorted((self.trigrams.get(gram, set()) for gram in _trigrams(word)), key=len)
+        found = postings[0] if candidates is None else postings[0] & candidates
+        for other in postings[1:]:
+            if not found:
+                break
+            found = found & other
+        # Trigrams can match out of order, so confirm the substring
+        return {doc_id for doc_id in found if word in self.documents[doc_id]}
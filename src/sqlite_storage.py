@@ -0,0 +1,267 @@
+import glob
+import json
+import os
+import sqlite3
+import sys
+import threading
+
+import metrics
+from storage import TaskStorage, write_format
+
+COLUMNS = ('id', 'name', 'priority', 'due_date', 'category', 'status', 'created_at')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL,
+    id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    priority TEXT NOT NULL DEFAULT 'Low',
+    due_date TEXT NOT NULL DEFAULT '',
+    category TEXT NOT NULL DEFAULT 'Personal',
+    status TEXT NOT NULL DEFAULT 'Pending',
+    created_at TEXT,
+    UNIQUE (username, id)
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (username, status, seq);
+CREATE INDEX IF NOT EXISTS idx_tasks_category ON tasks (username, category, seq);
+CREATE INDEX IF NOT EXISTS idx_tasks_due_date ON tasks (username, due_date);
+"""
+
+
+def _row_values(username, task):
+    """Column values for one task dictionary"""
+    return (
+        username,
+        task.get('id'),
+        task.get('name', ''),
+        task.get('priority', 'Low'),
+        task.get('due_date', '') or '',
+        task.get('category', 'Personal'),
+        task.get('status', 'Pending'),
+        task.get('created_at'),
+    )
+
+
+class SQLiteTaskStorage:
+    """
+    Task storage backed by a single SQLite database.
+
+    Uses the same load_tasks/save_tasks contract as TaskStorage, plus row-level
+    changes and indexed queries on status, category and due date.
+    """
+    def __init__(self, data_dir="data", db_name="tasks.db"):
+        self.data_dir = data_dir
+        if not os.path.exists(data_dir):
+            os.makedirs(data_dir)
+        self.db_path = os.path.join(data_dir, db_name)
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self._lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.executescript(SCHEMA)
+
+    @metrics.timed("storage.load_tasks")
+    def load_tasks(self, username):
+        """Load tasks for a specific user"""
+        tasks = self.query_tasks(username)
+        metrics.count("storage.rows_read", len(tasks))
+        return tasks
+
+    def iter_tasks(self, username, chunk_size=1000):
+        """Stream a user's tasks as lists of at most chunk_size dictionaries"""
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM tasks WHERE username = ? ORDER BY seq",
+                (username,)
+            )
+            rows = cursor.fetchmany(chunk_size)
+        while rows:
+            metrics.count("storage.rows_read", len(rows))
+            yield [{column: row[column] for column in COLUMNS} for row in rows]
+            with self._lock:
+                rows = cursor.fetchmany(chunk_size)
+
+    @metrics.timed("storage.save_tasks")
+    def save_tasks(self, username, tasks):
+        """Replace all tasks for a specific user"""
+        try:
+            with self._lock, self.conn:
+                self.conn.execute("DELETE FROM tasks WHERE username = ?", (username,))
+                self.conn.executemany(
+                    "INSERT INTO tasks (username, id, name, priority, due_date, category, status, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (_row_values(username, task) for task in tasks)
+                )
+            metrics.count("storage.rows_written", len(tasks))
+            return True
+        except Exception as e:
+            print(f"Error saving tasks: {e}", file=sys.stderr)
+            return False
+
+    def insert_task(self, username, task):
+        """Insert a new task"""
+        return self._execute(
+            "INSERT INTO tasks (username, id, name, priority, due_date, category, status, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            _row_values(username, task)
+        )
+
+    def update_task(self, username, task):
+        """Update an existing task, keeping its position"""
+        values = _row_values(username, task)
+        return self._execute(
+            "UPDATE tasks SET name = ?, priority = ?, due_date = ?, category = ?, status = ?, created_at = ? "
+            "WHERE username = ? AND id = ?",
+            values[2:] + values[:2]
+        )
+
+    def put_task(self, username, task):
+        """Insert or update a single task dictionary"""
+        return self._execute(
+            "INSERT INTO tasks (username, id, name, priority, due_date, category, status, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (username, id) DO UPDATE SET name = excluded.name, priority = excluded.priority, "
+            "due_date = excluded.due_date, category = excluded.category, status = excluded.status, "
+            "created_at = excluded.created_at",
+            _row_values(username, task)
+        )
+
+    def delete_task(self, username, task_id):
+        """Delete a single task by id"""
+        return self._execute(
+            "DELETE FROM tasks WHERE username = ? AND id = ?",
+            (username, task_id)
+        )
+
+    @metrics.timed("storage.apply_changes")
+    def apply_changes(self, username, changes):
+        """
+        Apply several changes in one transaction: changes maps task id to the
+        new task dictionary, or to None to delete the task.
+        """
+        puts = [_row_values(username, task) for task in changes.values() if task is not None]
+        deletes = [(username, task_id) for task_id, task in changes.items() if task is None]
+        try:
+            with self._lock, self.conn:
+                self.conn.executemany(
+                    "INSERT INTO tasks (username, id, name, priority, due_date, category, status, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (username, id) DO UPDATE SET name = excluded.name, priority = excluded.priority, "
+                    "due_date = excluded.due_date, category = excluded.category, status = excluded.status, "
+                    "created_at = excluded.created_at",
+                    puts
+                )
+                self.conn.executemany("DELETE FROM tasks WHERE username = ? AND id = ?", deletes)
+            metrics.count("storage.rows_written", len(changes))
+            return True
+        except Exception as e:
+            print(f"Error saving tasks: {e}", file=sys.stderr)
+            return False
+
+    def get_task(self, username, task_id):
+        """Fetch a single task dictionary, or None"""
+        with self._lock:
+            row = self.conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM tasks WHERE username = ? AND id = ?",
+                (username, task_id)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def query_tasks(self, username, status=None, category=None, priority=None,
+                    due_from=None, due_to=None, limit=None, offset=0):
+        """Return task dictionaries matching the given filters, in insertion order"""
+        where, params = self._where(username, status, category, priority, due_from, due_to)
+        sql = f"SELECT {', '.join(COLUMNS)} FROM tasks WHERE {where} ORDER BY seq"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += [limit, offset]
+        with self._lock:
+            return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def count_tasks(self, username, status=None, category=None, priority=None,
+                    due_from=None, due_to=None):
+        """Count tasks matching the given filters"""
+        where, params = self._where(username, status, category, priority, due_from, due_to)
+        with self._lock:
+            return self.conn.execute(f"SELECT COUNT(*) FROM tasks WHERE {where}", params).fetchone()[0]
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self.conn.close()
+
+    def _where(self, username, status, category, priority, due_from, due_to):
+        """Build the WHERE clause for a query"""
+        clauses = ["username = ?"]
+        params = [username]
+        for column, value in (('status', status), ('category', category), ('priority', priority)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if due_from is not None or due_to is not None:
+            clauses.append("due_date != ''")
+        if due_from is not None:
+            clauses.append("due_date >= ?")
+            params.append(str(due_from))
+        if due_to is not None:
+            clauses.append("due_date <= ?")
+            params.append(str(due_to))
+        return " AND ".join(clauses), params
+
+    def _execute(self, sql, params):
+        """Run a single write statement in its own transaction"""
+        try:
+            with self._lock, self.conn:
+                cursor = self.conn.execute(sql, params)
+            return cursor.rowcount > 0
+        except Exception as e:
+            print(f"Error saving tasks: {e}", file=sys.stderr)
+            return False
+
+
+# Files that hold a user's JSON-backend tasks; a user may have a journal but no snapshot yet
+JSON_SUFFIXES = ("_tasks.json", "_tasks.journal", "_tasks.journal.compacting")
+
+
+def _json_users(data_dir):
+    """Every user with a task file, journal or journal segment in data_dir"""
+    users = set()
+    for suffix in JSON_SUFFIXES:
+        for path in glob.glob(os.path.join(data_dir, "*" + suffix)):
+            users.add(os.path.basename(path)[:-len(suffix)])
+    return sorted(users)
+
+
+def migrate_json_to_sqlite(data_dir="data", sqlite_storage=None):
+    """
+    Copy every user's <user>_tasks.json file and journal in data_dir into
+    SQLite, including users whose tasks are still only in the journal.
+
+    Each user's row count is checked against the source. Only when every
+    user made it is the data directory marked as using SQLite; otherwise
+    IOError is raised and the directory keeps using the JSON files.
+    Returns a dictionary of username -> number of tasks migrated.
+    """
+    if sqlite_storage is None:
+        sqlite_storage = SQLiteTaskStorage(data_dir)
+    json_storage = TaskStorage(data_dir, journal=True)
+    migrated = {}
+    for username in _json_users(data_dir):
+        tasks = json_storage.load_tasks(username)
+        if not sqlite_storage.save_tasks(username, tasks):
+            raise IOError(f"Could not migrate tasks for {username}")
+        stored = sqlite_storage.count_tasks(username)
+        if stored != len(tasks):
+            raise IOError(f"Migrated {stored} of {len(tasks)} tasks for {username}")
+        migrated[username] = len(tasks)
+    write_format(data_dir, "sqlite")
+    return migrated
+
+
+if __name__ == "__main__":
+    result = migrate_json_to_sqlite(sys.argv[1] if len(sys.argv) > 1 else "data")
+    print(json.dumps(result, indent=4))
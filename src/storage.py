@@ -1,22 +1,212 @@
 import json
 import os
-from datetime import datetime
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
+
+try:
+    import fcntl
+except ImportError:
+    # No advisory locking available (e.g. Windows): fall back to in-process locking only
+    fcntl = None
+
+import metrics
+from compact_set import CompactSet
+from ids import new_id
+
+# Journal size (bytes) after which a background compaction is started
+COMPACT_THRESHOLD = 256 * 1024
+# Writers wait for a running compaction once the journal is this many times the threshold
+JOURNAL_BACKLOG_FACTOR = 16
+# Tasks per chunk yielded by the streaming loader
+LOAD_CHUNK_SIZE = 1000
+# Characters read from disk at a time by the streaming loader
+READ_BLOCK_SIZE = 64 * 1024
+# File in a data directory that records which storage format it uses
+FORMAT_FILE = "storage_format"
+
+_encode = json.JSONEncoder(ensure_ascii=False).encode
+
+
+def date_to_ordinal(value):
+    """Convert a 'YYYY-MM-DD' string to a date ordinal (0 for no date)"""
+    if not value:
+        return 0
+    value = str(value)
+    if len(value) != 10 or value[4] != '-':
+        return None
+    try:
+        return date.fromisoformat(value).toordinal()
+    except ValueError:
+        return None
+
+
+def ordinal_to_date(ordinal):
+    """Convert a date ordinal back to a 'YYYY-MM-DD' string"""
+    return date.fromordinal(ordinal).isoformat() if ordinal else ""
+
+
+def timestamp_to_seconds(value):
+    """Convert a 'YYYY-MM-DD HH:MM:SS' string to whole seconds since 0001-01-01"""
+    if not isinstance(value, str) or len(value) != 19 or value[10] != ' ':
+        return None
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    return moment.toordinal() * 86400 + moment.hour * 3600 + moment.minute * 60 + moment.second
+
+
+def seconds_to_timestamp(seconds):
+    """Convert seconds since 0001-01-01 back to a 'YYYY-MM-DD HH:MM:SS' string"""
+    days, rest = divmod(seconds, 86400)
+    hours, rest = divmod(rest, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{date.fromordinal(days).isoformat()} {hours:02d}:{minutes:02d}:{secs:02d}"
+
+
+def iter_json_array(f, block_size=READ_BLOCK_SIZE):
+    """
+    Yield the objects of a top-level JSON array from an open text file one
+    at a time, reading block_size characters at a time instead of the whole
+    file. Elements must be JSON objects, as in the task files.
+    """
+    decoder = json.JSONDecoder()
+    buf = f.read(block_size)
+    pos = 0
+    opened = False
+    while True:
+        # Skip whitespace and the punctuation between elements
+        while pos < len(buf) and buf[pos] in ' \t\r\n,[':
+            if buf[pos] == '[':
+                if opened:
+                    break
+                opened = True
+            pos += 1
+        if pos == len(buf):
+            more = f.read(block_size)
+            if not more:
+                if opened:
+                    raise ValueError("Unexpected end of task file")
+                return
+            buf, pos = buf[pos:] + more, 0
+            continue
+        if not opened:
+            raise ValueError("Task file is not a JSON array")
+        if buf[pos] == ']':
+            return
+        try:
+            obj, end = decoder.raw_decode(buf, pos)
+        except ValueError:
+            # Element continues past the end of the buffer
+            more = f.read(block_size)
+            if not more:
+                raise
+            buf, pos = buf[pos:] + more, 0
+            continue
+        yield obj
+        pos = end
+
+
+def _interned(value, default):
+    """Intern a field value; null falls back to default and other non-strings become strings"""
+    if value is None:
+        value = default
+    return sys.intern(value if isinstance(value, str) else str(value))
+
+
+def unique_ids(tasks, seen=None):
+    """
+    Yield task dictionaries, re-keying any task whose id repeats an earlier
+    one (legacy timestamp ids could collide) to "<id>-<n>" for the first n
+    not taken yet. The choice only depends on the order of the tasks, so
+    every reader of the same file assigns the same ids. seen is the set of
+    ids taken so far; streaming readers pass a CompactSet.
+    """
+    seen = set() if seen is None else seen
+    for task in tasks:
+        task_id = task.get('id')
+        if task_id is not None:
+            key = str(task_id)
+            n = 0
+            while True:
+                # Works for set and CompactSet alike: the size grows only for a new id
+                size = len(seen)
+                seen.add(key)
+                if len(seen) > size:
+                    break
+                n += 1
+                key = f"{task_id}-{n}"
+            if n:
+                task = dict(task, id=key)
+        yield task
+
 
 class Task:
-    """Task class to represent a single task"""
+    """
+    Task class to represent a single task
+
+    Uses __slots__ instead of a per-instance __dict__. Priority, category and
+    status strings are interned, and dates are held as integers: due_ordinal
+    is a date ordinal (0 for no due date) and created_ts counts seconds since
+    0001-01-01. due_date and created_at still read and write as strings.
+    Values that don't parse as dates are kept verbatim.
+    """
+    __slots__ = ('id', 'name', 'priority', 'category', 'status',
+                 '_due', '_created')
+    
     def __init__(self, name, priority="Low", due_date="", category="Personal", 
                  status="Pending", task_id=None, created_at=None):
         self.id = task_id if task_id else self._generate_id()
         self.name = name
-        self.priority = priority
-        self.due_date = str(due_date) if due_date else ""
-        self.category = category
-        self.status = status
-        self.created_at = created_at if created_at else datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.priority = _interned(priority, "Low")
+        self.due_date = due_date
+        self.category = _interned(category, "Personal")
+        self.status = _interned(status, "Pending")
+        if created_at:
+            self.created_at = created_at
+        else:
+            now = datetime.now()
+            self._created = now.toordinal() * 86400 + now.hour * 3600 + now.minute * 60 + now.second
+    
+    @property
+    def due_date(self):
+        """Due date as a 'YYYY-MM-DD' string ("" when unset)"""
+        due = self._due
+        return ordinal_to_date(due) if due.__class__ is int else due
+    
+    @due_date.setter
+    def due_date(self, value):
+        ordinal = date_to_ordinal(value)
+        self._due = ordinal if ordinal is not None else str(value)
+    
+    @property
+    def due_ordinal(self):
+        """Due date as a date ordinal, 0 when unset or unparseable"""
+        due = self._due
+        return due if due.__class__ is int else 0
+    
+    @property
+    def created_at(self):
+        """Creation time as a 'YYYY-MM-DD HH:MM:SS' string"""
+        created = self._created
+        return seconds_to_timestamp(created) if created.__class__ is int else created
+    
+    @created_at.setter
+    def created_at(self, value):
+        seconds = timestamp_to_seconds(value)
+        self._created = seconds if seconds is not None else str(value)
+    
+    @property
+    def created_ts(self):
+        """Creation time in seconds since 0001-01-01, 0 when unparseable"""
+        created = self._created
+        return created if created.__class__ is int else 0
     
     def _generate_id(self):
         """Generate a unique task ID"""
-        return datetime.now().strftime("%Y%m%d%H%M%S%f")
+        return new_id()
     
     def to_dict(self):
         """Convert task to dictionary"""
@@ -45,8 +235,33 @@ class Task:
 
 
 class TaskStorage:
-    def __init__(self, data_dir="data"):
+    """
+    JSON task storage, one file per user.
+
+    With journal=True every change is appended to <user>_tasks.journal as a
+    single JSON line instead of rewriting the whole task file. Loading replays
+    the journal over the snapshot, and once the journal grows past
+    compact_threshold it is folded back into the snapshot on a background thread.
+    Tasks whose id repeats an earlier one are re-keyed as they are read (see
+    unique_ids), so legacy files with colliding ids lose nothing.
+
+    Several processes may share one data directory. Every write holds an
+    exclusive fcntl lock on <user>_tasks.lock (reads a shared one), files are
+    replaced atomically, and <user>_tasks.version counts writes. A full
+    save_tasks after load_tasks is checked against that version: if another
+    process wrote in between, the two sets of changes are merged by task id,
+    and the save is rejected if both touched the same task.
+    """
+    def __init__(self, data_dir="data", journal=False, compact_threshold=COMPACT_THRESHOLD):
         self.data_dir = data_dir
+        self.journal = journal
+        self.compact_threshold = compact_threshold
+        self._lock = threading.RLock()
+        self._compactions = {}
+        self._file_locks = {}
+        # Per user: version seen at the last load/save, and task fingerprints at that version
+        self._versions = {}
+        self._fingerprints = {}
         if not os.path.exists(data_dir):
             os.makedirs(data_dir)
     
@@ -54,25 +269,488 @@ class TaskStorage:
         """Get the file path for a specific user's tasks"""
         return os.path.join(self.data_dir, f"{username}_tasks.json")
     
+    def get_journal_file(self, username):
+        """Get the journal file path for a specific user"""
+        return os.path.join(self.data_dir, f"{username}_tasks.journal")
+    
+    def get_version_file(self, username):
+        """Get the write-counter file path for a specific user"""
+        return os.path.join(self.data_dir, f"{username}_tasks.version")
+    
+    def _compacting_file(self, username):
+        """Journal segment currently being folded into the snapshot"""
+        return self.get_journal_file(username) + ".compacting"
+    
+    def _journal_paths(self, username):
+        """Journal files to replay over the snapshot, oldest first"""
+        if not self.journal:
+            return []
+        return [self._compacting_file(username), self.get_journal_file(username)]
+    
+    @metrics.timed("storage.load_tasks")
     def load_tasks(self, username):
         """Load tasks for a specific user"""
+        with self._locked(username, exclusive=False):
+            _count_file("storage.bytes_read", self.get_user_file(username))
+            tasks = self._replay(self._read_snapshot(username), self._journal_paths(username))
+            self._versions[username] = self._read_version(username)
+            self._fingerprints[username] = {t.get('id'): _fingerprint(t) for t in tasks}
+            metrics.count("storage.rows_read", len(tasks))
+            return tasks
+    
+    @metrics.timed("storage.save_tasks")
+    def save_tasks(self, username, tasks):
+        """Save tasks for a specific user; returns False if rejected as stale"""
+        with self._locked(username):
+            expected = self._versions.get(username)
+            if expected is not None and expected != self._read_version(username):
+                tasks = self._merge_stale(username, tasks)
+                if tasks is None:
+                    return False
+            if not self._write_snapshot(username, tasks):
+                return False
+            if self.journal:
+                # The snapshot now holds everything, so any journal is stale
+                for path in (self._compacting_file(username), self.get_journal_file(username)):
+                    if os.path.exists(path):
+                        os.remove(path)
+            self._versions[username] = self._bump_version(username)
+            self._fingerprints[username] = {t.get('id'): _fingerprint(t) for t in tasks}
+            metrics.count("storage.rows_written", len(tasks))
+            return True
+    
+    def put_task(self, username, task):
+        """Insert or update a single task dictionary"""
+        return self.apply_changes(username, {task.get('id'): task})
+    
+    def delete_task(self, username, task_id):
+        """Delete a single task by id"""
+        return self.apply_changes(username, {task_id: None})
+    
+    @metrics.timed("storage.apply_changes")
+    def apply_changes(self, username, changes):
+        """
+        Apply several changes as one write: changes maps task id to the new
+        task dictionary, or to None to delete the task.
+        """
+        if not changes:
+            return True
+        with self._locked(username):
+            if not self.journal:
+                by_id = {t.get('id'): t for t in self.load_tasks(username)}
+                for task_id, task in changes.items():
+                    if task is None:
+                        by_id.pop(task_id, None)
+                    else:
+                        by_id[task_id] = task
+                return self.save_tasks(username, list(by_id.values()))
+            appended = self._append(username, changes)
+        if appended:
+            self._limit_journal(username)
+        return appended
+    
+    def iter_tasks(self, username, chunk_size=LOAD_CHUNK_SIZE):
+        """
+        Stream a user's tasks as lists of at most chunk_size dictionaries.
+
+        Only one read block and one chunk are held at a time, so memory stays
+        bounded by the chunk size rather than the file size (plus a compact
+        set of id hashes for spotting repeated ids). Journal records (kept
+        small by compaction) are read up front and applied on the fly. A task
+        file that can't be parsed raises ValueError once the tasks before the
+        bad record have been yielded.
+        """
+        with self._locked(username, exclusive=False):
+            changes = self._journal_changes(self._journal_paths(username))
+            _count_file("storage.bytes_read", self.get_user_file(username))
+            f = self._open_snapshot(username)
+            # Streaming keeps no fingerprints, so a later full save can't be merged
+            self._versions[username] = self._read_version(username)
+            self._fingerprints.pop(username, None)
+        
+        chunk = []
+        for task in self._merged_records(f, changes):
+            chunk.append(task)
+            if len(chunk) >= chunk_size:
+                metrics.count("storage.rows_read", len(chunk))
+                yield chunk
+                chunk = []
+        if chunk:
+            metrics.count("storage.rows_read", len(chunk))
+            yield chunk
+    
+    def wait_for_compaction(self, username=None):
+        """Block until background compaction (of one or all users) is done"""
+        with self._lock:
+            threads = [t for user, t in self._compactions.items()
+                       if username is None or user == username]
+        for thread in threads:
+            thread.join()
+    
+    @contextmanager
+    def _locked(self, username, exclusive=True):
+        """
+        Hold the in-process lock and the user's advisory file lock.
+
+        Re-entrant within this storage object; a shared lock is upgraded
+        when an exclusive one is requested inside it.
+        """
+        with self._lock:
+            held = self._file_locks.get(username)
+            if held is None:
+                lock_file = open(os.path.join(self.data_dir, f"{username}_tasks.lock"), 'a')
+                held = self._file_locks[username] = {'file': lock_file, 'exclusive': False, 'depth': 0}
+            if fcntl is not None and (held['depth'] == 0 or (exclusive and not held['exclusive'])):
+                fcntl.flock(held['file'], fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            held['exclusive'] = held['exclusive'] or exclusive
+            held['depth'] += 1
+            try:
+                yield
+            finally:
+                held['depth'] -= 1
+                if held['depth'] == 0:
+                    if fcntl is not None:
+                        fcntl.flock(held['file'], fcntl.LOCK_UN)
+                    held['file'].close()
+                    del self._file_locks[username]
+    
+    def _read_version(self, username):
+        """Number of writes made to this user's tasks so far"""
+        try:
+            with open(self.get_version_file(username), 'r', encoding='utf-8') as f:
+                return int(f.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+    
+    def _bump_version(self, username):
+        """Count one more write; call with the exclusive lock held"""
+        version = self._read_version(username) + 1
+        path = self.get_version_file(username)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(str(version))
+        os.replace(tmp_path, path)
+        return version
+    
+    def _merge_stale(self, username, tasks):
+        """
+        Merge a save based on an outdated version with what is on disk now.
+
+        Returns the merged task list, or None if this save and the newer
+        writes changed the same task.
+        """
+        base = self._fingerprints.get(username)
+        if base is None:
+            print(f"Error saving tasks: {username}'s tasks changed on disk since they were loaded",
+                  file=sys.stderr)
+            return None
+        theirs = {t.get('id'): t for t in self._replay(self._read_snapshot(username),
+                                                        self._journal_paths(username))}
+        ours = {t.get('id'): t for t in tasks}
+        
+        ours_changed = {i: t for i, t in ours.items() if base.get(i) != _fingerprint(t)}
+        ours_deleted = [i for i in base if i not in ours]
+        theirs_changed = {i for i, t in theirs.items() if base.get(i) != _fingerprint(t)}
+        theirs_changed.update(i for i in base if i not in theirs)
+        
+        conflicts = [i for i in ours_changed if i in theirs_changed
+                     and (i not in theirs or _fingerprint(theirs[i]) != _fingerprint(ours_changed[i]))]
+        conflicts += [i for i in ours_deleted if i in theirs_changed and i in theirs]
+        if conflicts:
+            print(f"Error saving tasks: {len(conflicts)} task(s) were changed by another process", file=sys.stderr)
+            return None
+        
+        for task_id in ours_deleted:
+            theirs.pop(task_id, None)
+        theirs.update(ours_changed)
+        return list(theirs.values())
+    
+    def _read_snapshot(self, username):
+        """Read the full task file"""
         file_path = self.get_user_file(username)
         if os.path.exists(file_path):
             try:
                 with open(file_path, 'r', encoding='utf-8') as f:
                     return json.load(f)
             except Exception as e:
-                print(f"Error loading tasks: {e}")
+                print(f"Error loading tasks: {e}", file=sys.stderr)
                 return []
         return []
     
-    def save_tasks(self, username, tasks):
-        """Save tasks for a specific user"""
+    def _open_snapshot(self, username):
+        """Open the task file for streaming, or return None if there is none"""
+        try:
+            return open(self.get_user_file(username), 'r', encoding='utf-8')
+        except FileNotFoundError:
+            return None
+    
+    def _snapshot_records(self, f):
+        """Iterate over the task dictionaries of an open task file"""
+        return iter_json_array(f)
+    
+    def _write_file(self, path, tasks):
+        """Write a complete task file to path, streaming tasks from any iterable"""
+        with open(path, 'w', encoding='utf-8') as f:
+            separator = "[\n    "
+            for task in tasks:
+                f.write(separator)
+                f.write(_format_task(task))
+                separator = ",\n    "
+            f.write("[]" if separator.startswith("[") else "\n]")
+    
+    def _write_snapshot(self, username, tasks):
+        """Write the full task file atomically"""
         file_path = self.get_user_file(username)
+        tmp_path = f"{file_path}.{os.getpid()}.tmp"
         try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(tasks, f, indent=4, ensure_ascii=False)
+            self._write_file(tmp_path, tasks)
+            os.replace(tmp_path, file_path)
+            _count_file("storage.bytes_written", file_path)
             return True
         except Exception as e:
-            print(f"Error saving tasks: {e}")
-            return False
\ No newline at end of file
+            print(f"Error saving tasks: {e}", file=sys.stderr)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+    
+    def _read_journal(self, journal_paths):
+        """Yield the records of the given journal files in order"""
+        for path in journal_paths:
+            if not os.path.exists(path):
+                continue
+            _count_file("storage.bytes_read", path)
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        # Torn write at the end of the journal
+                        continue
+    
+    def _replay(self, tasks, journal_paths):
+        """Apply journal records on top of a snapshot, re-keying repeated ids"""
+        by_id = {t.get('id'): t for t in unique_ids(tasks)}
+        for task_id, task in self._iter_changes(journal_paths):
+            if task is None:
+                by_id.pop(task_id, None)
+            else:
+                by_id[task_id] = task
+        return list(by_id.values())
+    
+    def _journal_changes(self, journal_paths):
+        """Final state per task id after the journal: a task dict, or None if deleted"""
+        return dict(self._iter_changes(journal_paths))
+    
+    def _merged_records(self, f, changes):
+        """
+        Yield the tasks of an open snapshot file (None for no file) with
+        journal changes applied, then the tasks the journal added. Repeated
+        ids are re-keyed as in unique_ids; changes is consumed.
+        """
+        if f is not None:
+            with f:
+                for task in unique_ids(self._snapshot_records(f), CompactSet()):
+                    task_id = task.get('id')
+                    if task_id in changes:
+                        task = changes.pop(task_id)
+                        if task is None:
+                            continue
+                    yield task
+        # Tasks created since the last snapshot
+        for task in changes.values():
+            if task is not None:
+                yield task
+    
+    def _iter_changes(self, journal_paths):
+        """Yield (task id, task dict or None) for every change in the journals"""
+        for record in self._read_journal(journal_paths):
+            op = record.get('op')
+            records = record.get('records', []) if op == 'batch' else [record]
+            for change in records:
+                if change.get('op') == 'put':
+                    task = change['task']
+                    yield task.get('id'), task
+                elif change.get('op') == 'delete':
+                    yield change.get('id'), None
+    
+    def _append(self, username, changes):
+        """Append changes to the user's journal as a single line"""
+        records = [
+            {'op': 'delete', 'id': task_id} if task is None else {'op': 'put', 'task': task}
+            for task_id, task in changes.items()
+        ]
+        # A batch is one line, so a torn write drops all of it or none
+        record = records[0] if len(records) == 1 else {'op': 'batch', 'records': records}
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n"
+        with self._locked(username):
+            try:
+                with open(self.get_journal_file(username), 'a', encoding='utf-8') as f:
+                    f.write(line)
+                    size = f.tell()
+                metrics.count("storage.bytes_written", len(line))
+                metrics.count("storage.rows_written", len(changes))
+            except Exception as e:
+                print(f"Error saving tasks: {e}", file=sys.stderr)
+                return False
+            up_to_date = self._versions.get(username) == self._read_version(username)
+            version = self._bump_version(username)
+            if up_to_date:
+                # Nobody else wrote in between, so our view is still current
+                self._versions[username] = version
+                fingerprints = self._fingerprints.get(username)
+                if fingerprints is not None:
+                    for task_id, task in changes.items():
+                        if task is None:
+                            fingerprints.pop(task_id, None)
+                        else:
+                            fingerprints[task_id] = _fingerprint(task)
+            if size >= self.compact_threshold:
+                self._start_compaction(username)
+        return True
+    
+    def _limit_journal(self, username):
+        """
+        Once the journal reaches JOURNAL_BACKLOG_FACTOR times compact_threshold,
+        wait for the running compaction and rotate again. A burst of writes
+        such as a large import then can't pile up a journal segment that the
+        next compaction would have to hold in memory. Call without the lock.
+        """
+        journal = self.get_journal_file(username)
+        try:
+            if os.path.getsize(journal) < JOURNAL_BACKLOG_FACTOR * self.compact_threshold:
+                return
+        except OSError:
+            return
+        self.wait_for_compaction(username)
+        with self._locked(username):
+            if os.path.exists(journal) and os.path.getsize(journal) >= self.compact_threshold:
+                self._start_compaction(username)
+    
+    def _start_compaction(self, username):
+        """Rotate the journal and fold it into the snapshot in the background"""
+        running = self._compactions.get(username)
+        if running is not None and running.is_alive():
+            return
+        compacting = self._compacting_file(username)
+        if os.path.exists(compacting) and not self._fold_segment(username):
+            return
+        os.replace(self.get_journal_file(username), compacting)
+        thread = threading.Thread(target=self._compact, args=(username,), daemon=True)
+        self._compactions[username] = thread
+        thread.start()
+    
+    def _fold_segment(self, username):
+        """
+        Fold a rotated journal segment left behind by a compaction that
+        never finished (say the process exited mid-way) into the snapshot.
+        Call with the exclusive lock held. A compaction of the same segment
+        still running elsewhere notices the snapshot changed and gives up.
+        """
+        compacting = self._compacting_file(username)
+        changes = self._journal_changes([compacting])
+        records = self._merged_records(self._open_snapshot(username), changes)
+        if not self._write_snapshot(username, records):
+            return False
+        os.remove(compacting)
+        return True
+    
+    @metrics.timed("storage.compact")
+    def _compact(self, username):
+        """Merge the rotated journal segment into a new snapshot"""
+        file_path = self.get_user_file(username)
+        compacting = self._compacting_file(username)
+        tmp_path = f"{file_path}.{os.getpid()}.compact"
+        with self._locked(username, exclusive=False):
+            before = (_file_identity(file_path), _file_identity(compacting))
+        if before[1] is None:
+            # A full save already folded the journal away
+            return
+        try:
+            # Streamed, so compaction holds the journal segment but never the whole snapshot
+            changes = self._journal_changes([compacting])
+            self._write_file(tmp_path, self._merged_records(self._open_snapshot(username), changes))
+        except Exception as e:
+            print(f"Error compacting tasks: {e}", file=sys.stderr)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        with self._locked(username):
+            if (_file_identity(file_path), _file_identity(compacting)) != before:
+                # A full save replaced the snapshot while we were working
+                os.remove(tmp_path)
+                return
+            os.replace(tmp_path, file_path)
+            os.remove(compacting)
+        _count_file("storage.bytes_written", file_path)
+
+
+def _format_task(task):
+    """
+    A task dictionary laid out as json.dump(tasks, indent=4) would inside the
+    task list, but through the C encoder (indent forces the slow pure-Python one)
+    """
+    if not task:
+        return "{}"
+    fields = ",\n        ".join(f"{_encode(key)}: {_encode(value)}" for key, value in task.items())
+    return "{\n        " + fields + "\n    }"
+
+
+def _fingerprint(task):
+    """Cheap content hash of a task dictionary, for detecting changes"""
+    try:
+        return hash(tuple(task.items()))
+    except TypeError:
+        return hash(json.dumps(task, sort_keys=True))
+
+
+def _count_file(name, path):
+    """Add the size of a file to a metrics counter, if metrics are enabled"""
+    if metrics.enabled:
+        try:
+            metrics.count(name, os.path.getsize(path))
+        except OSError:
+            pass
+
+
+def _file_identity(path):
+    """Identity of a file's current contents, or None if it doesn't exist"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def read_format(data_dir):
+    """Storage format recorded for a data directory ("json" if none)"""
+    try:
+        with open(os.path.join(data_dir, FORMAT_FILE), 'r', encoding='utf-8') as f:
+            return f.read().strip() or "json"
+    except FileNotFoundError:
+        return "json"
+
+
+def write_format(data_dir, backend):
+    """Record the storage format of a data directory"""
+    with open(os.path.join(data_dir, FORMAT_FILE), 'w', encoding='utf-8') as f:
+        f.write(backend + "\n")
+
+
+def open_storage(data_dir="data", backend=None):
+    """
+    Create the task storage backend for a data directory.
+
+    backend is "json", "binary" or "sqlite"; by default the format recorded
+    in the data directory is used.
+    """
+    if backend is None:
+        backend = read_format(data_dir)
+    if backend == "sqlite":
+        from sqlite_storage import SQLiteTaskStorage
+        return SQLiteTaskStorage(data_dir)
+    if backend == "binary":
+        from binary_storage import BinaryTaskStorage
+        return BinaryTaskStorage(data_dir, journal=True)
+    if backend == "json":
+        return TaskStorage(data_dir, journal=True)
+    raise ValueError(f"Unknown storage backend: {backend}")
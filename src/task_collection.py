@@ -0,0 +1,380 @@
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter
+from datetime import date
+
+from search_index import SearchIndex
+from task_sort import make_sort_key
+
+# Out-of-order additions between lookups that are inserted in place before the
+# due-date index switches to appending and sorting on the next lookup
+INSORT_LIMIT = 64
+
+
+def name_key(name):
+    """Key used for case-insensitive task name comparisons"""
+    return name.strip().casefold()
+
+
+def _search_text(task):
+    """Text a task is found by in searches"""
+    return f"{task.name} {task.category}"
+
+
+def build_search_index(tasks):
+    """
+    SearchIndex over the names and categories of tasks, built in one batch.
+    Safe to run on a worker thread for tasks that aren't being changed.
+    """
+    index = SearchIndex()
+    index.add_many((task.id, _search_text(task)) for task in tasks)
+    return index
+
+
+class TaskStats:
+    """
+    Task counters updated on every change instead of recomputed by scanning.
+
+    Unfinished tasks with a due date are also counted per date ordinal, so
+    the overdue and due-today figures only look at distinct dates, never at
+    tasks.
+    """
+    def __init__(self):
+        self.total = 0
+        self.by_status = Counter()
+        self.by_priority = Counter()
+        self.by_category = Counter()
+        self.open_by_due_date = Counter()
+
+    def add(self, task, count=1):
+        """Count a task (or un-count it with count=-1)"""
+        self.total += count
+        self._bump(self.by_status, task.status, count)
+        self._bump(self.by_priority, task.priority, count)
+        self._bump(self.by_category, task.category, count)
+        if task.status != "Completed" and task.due_ordinal:
+            self._bump(self.open_by_due_date, task.due_ordinal, count)
+
+    def remove(self, task):
+        """Stop counting a task"""
+        self.add(task, -1)
+
+    def overdue(self, today=None):
+        """Number of unfinished tasks due before today"""
+        today = (today or date.today()).toordinal()
+        return sum(n for due, n in self.open_by_due_date.items() if due < today)
+
+    def due_today(self, today=None):
+        """Number of unfinished tasks due today"""
+        return self.open_by_due_date.get((today or date.today()).toordinal(), 0)
+
+    def summary(self, today=None):
+        """All counters as a plain dictionary"""
+        return {
+            'total': self.total,
+            'status': dict(self.by_status),
+            'priority': dict(self.by_priority),
+            'category': dict(self.by_category),
+            'overdue': self.overdue(today),
+            'due_today': self.due_today(today),
+        }
+
+    @staticmethod
+    def _bump(counter, key, count):
+        """Adjust a counter, dropping keys that reach zero"""
+        value = counter[key] + count
+        if value:
+            counter[key] = value
+        else:
+            del counter[key]
+
+
+class DueDateIndex:
+    """
+    Unfinished tasks with a due date, kept sorted by (due ordinal, task id).
+
+    Range lookups bisect to the first matching entry and slice, so the
+    overdue, due-today and upcoming views cost O(log n + k). Single
+    additions are inserted in place; a run of more than INSORT_LIMIT
+    out-of-order additions (a bulk load) is appended instead and sorted on
+    the next lookup, which keeps bulk loading O(n log n).
+    """
+    def __init__(self):
+        self._entries = []
+        self._unsorted = False
+        self._inserts = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, task):
+        """Index a task if it is unfinished and has a due date"""
+        key = self._key(task)
+        if key is None:
+            return
+        entries = self._entries
+        if entries and key < entries[-1]:
+            if not self._unsorted and self._inserts < INSORT_LIMIT:
+                insort(entries, key)
+                self._inserts += 1
+                return
+            self._unsorted = True
+        entries.append(key)
+
+    def remove(self, task):
+        """Drop a task from the index"""
+        key = self._key(task)
+        if key is not None:
+            self._sort()
+            i = bisect_left(self._entries, key)
+            if i < len(self._entries) and self._entries[i] == key:
+                del self._entries[i]
+
+    def between(self, first, last):
+        """Task ids due from ordinal first to last inclusive, soonest first"""
+        self._sort()
+        start = bisect_left(self._entries, (first,))
+        end = bisect_right(self._entries, (last + 1,), start)
+        return [task_id for _, task_id in self._entries[start:end]]
+
+    def next_due_after(self, ordinal):
+        """Earliest due ordinal later than ordinal, or None"""
+        self._sort()
+        i = bisect_left(self._entries, (ordinal + 1,))
+        return self._entries[i][0] if i < len(self._entries) else None
+
+    def _sort(self):
+        """Restore the sort order after bulk additions"""
+        self._inserts = 0
+        if self._unsorted:
+            self._entries.sort()
+            self._unsorted = False
+
+    @staticmethod
+    def _key(task):
+        """Sort key of a task, or None if it doesn't belong in the index"""
+        if task.status == "Completed" or not task.due_ordinal:
+            return None
+        return (task.due_ordinal, task.id)
+
+
+class TaskCollection:
+    """
+    Ordered collection of Task objects with indexes kept in step with every change.
+
+    Tasks are kept in insertion order and looked up by id. A casefolded
+    name -> task id index makes uniqueness checks O(1), and a TaskStats
+    aggregator keeps per-status, priority, category and due-date counts.
+    A DueDateIndex keeps unfinished tasks sorted by due date, and each
+    task's sort key is cached until the task changes.
+    A SearchIndex over name and category answers live text searches; it is
+    built in bulk on the first search (or handed over after loading, see
+    use_search_index) and maintained incrementally from then on.
+    All changes to a task should go through add, update and remove so the
+    indexes and counters stay correct; each change also bumps version, so
+    results computed from the collection can tell when they are out of date.
+    """
+    def __init__(self, tasks=()):
+        self._tasks = {}
+        self._names = {}
+        # Only populated for legacy data that already holds duplicate names
+        self._shadowed = {}
+        self._positions = {}
+        self._next_position = 0
+        self.stats = TaskStats()
+        self.due_index = DueDateIndex()
+        self._search_index = None
+        self._sort_keys = {}
+        self.version = 0
+        for task in tasks:
+            self._insert(task)
+
+    def __len__(self):
+        return len(self._tasks)
+
+    def __iter__(self):
+        return iter(self._tasks.values())
+
+    def __contains__(self, task):
+        return self._tasks.get(task.id) is task
+
+    def get(self, task_id):
+        """Return the task with the given id, or None"""
+        return self._tasks.get(task_id)
+
+    def find_by_name(self, name):
+        """Return the task with the given name (case-insensitive), or None"""
+        task_id = self._names.get(name_key(name))
+        return self._tasks.get(task_id) if task_id is not None else None
+
+    def name_exists(self, name, exclude_id=None):
+        """Check whether another task already uses this name (case-insensitive)"""
+        task_id = self._names.get(name_key(name))
+        return task_id is not None and task_id != exclude_id
+
+    def due_between(self, first, last):
+        """Unfinished tasks due from ordinal first to last inclusive, soonest first"""
+        return [self._tasks[task_id] for task_id in self.due_index.between(first, last)]
+
+    def select(self, query):
+        """
+        Tasks matching a TaskQuery, in insertion order. Text and due-date
+        queries start from the search and due-date indexes instead of scanning.
+        """
+        if query.text:
+            match = query.matcher(check_text=False)
+            return [task for task in self.search(query.text) if match(task)]
+        if query.unfinished and query.has_due_range:
+            first = query.due_from if query.due_from is not None else 1
+            last = query.due_to if query.due_to is not None else date.max.toordinal()
+            match = query.matcher()
+            tasks = [task for task in self.due_between(first, last) if match(task)]
+            tasks.sort(key=lambda task: self._positions[task.id])
+            return tasks
+        match = query.matcher()
+        return [task for task in self._tasks.values() if match(task)]
+
+    def sort_key(self, task):
+        """Cached sort key tuple of a task (see task_sort)"""
+        key = self._sort_keys.get(task.id)
+        if key is None:
+            key = self._sort_keys[task.id] = make_sort_key(task, self._positions[task.id])
+        return key
+
+    @property
+    def search_index(self):
+        """SearchIndex over every task's name and category"""
+        if self._search_index is None:
+            self._search_index = build_search_index(self._tasks.values())
+        return self._search_index
+
+    def use_search_index(self, index):
+        """
+        Take over a SearchIndex built elsewhere (e.g. by build_search_index on
+        the loader thread); ignored if one is already maintained here or the
+        index doesn't cover exactly the tasks in the collection
+        """
+        if self._search_index is None and index.documents.keys() == self._tasks.keys():
+            self._search_index = index
+
+    def search(self, text):
+        """Tasks whose name or category match every word of text, in insertion order"""
+        ids = self.search_index.search(text)
+        if len(ids) * 4 > len(self._tasks):
+            return [task for task in self._tasks.values() if task.id in ids]
+        positions = self._positions
+        return [self._tasks[task_id] for task_id in sorted(ids, key=positions.__getitem__)]
+
+    def add(self, task):
+        """Add a task, rejecting duplicate ids and names"""
+        if task.id in self._tasks:
+            raise ValueError(f"Task id already exists: {task.id}")
+        if self.name_exists(task.name):
+            raise ValueError("A task with this name already exists")
+        self._insert(task)
+
+    def extend(self, tasks):
+        """
+        Add already-stored tasks without re-checking names (used when
+        loading); a repeated id still raises ValueError
+        """
+        inserted = []
+        try:
+            for task in tasks:
+                self._insert(task, search=False)
+                inserted.append(task)
+        finally:
+            self._index_search(inserted)
+
+    def add_many(self, tasks):
+        """
+        Add tasks in bulk, skipping names that already exist or repeat in the batch.
+
+        Returns (added, skipped) lists.
+        """
+        added = []
+        skipped = []
+        for task in tasks:
+            if task.id in self._tasks or self.name_exists(task.name):
+                skipped.append(task)
+            else:
+                self._insert(task, search=False)
+                added.append(task)
+        self._index_search(added)
+        return added, skipped
+
+    def update(self, task, **fields):
+        """Change fields of a task, keeping the indexes up to date"""
+        if 'name' in fields and name_key(fields['name']) != name_key(task.name):
+            if self.name_exists(fields['name'], exclude_id=task.id):
+                raise ValueError("A task with this name already exists")
+            self._unindex_name(task)
+            task.name = fields['name']
+            self._index_name(task)
+        self.stats.remove(task)
+        self.due_index.remove(task)
+        self._sort_keys.pop(task.id, None)
+        self.version += 1
+        for field, value in fields.items():
+            setattr(task, field, value)
+        self.stats.add(task)
+        self.due_index.add(task)
+        if self._search_index is not None and ('name' in fields or 'category' in fields):
+            self._search_index.remove(task.id)
+            self._search_index.add(task.id, _search_text(task))
+
+    def remove(self, task):
+        """Remove a task"""
+        del self._tasks[task.id]
+        del self._positions[task.id]
+        self.version += 1
+        self._sort_keys.pop(task.id, None)
+        self._unindex_name(task)
+        self.stats.remove(task)
+        self.due_index.remove(task)
+        if self._search_index is not None:
+            self._search_index.remove(task.id)
+
+    def _insert(self, task, search=True):
+        """
+        Store a task and index it; a repeated id would corrupt the counters.
+        With search=False the caller adds it to the search index itself
+        (see _index_search).
+        """
+        if task.id in self._tasks:
+            raise ValueError(f"Task id already exists: {task.id}")
+        self._tasks[task.id] = task
+        self._positions[task.id] = self._next_position
+        self._next_position += 1
+        self.version += 1
+        self._index_name(task)
+        self.stats.add(task)
+        self.due_index.add(task)
+        if search and self._search_index is not None:
+            self._search_index.add(task.id, _search_text(task))
+
+    def _index_search(self, tasks):
+        """Add tasks to the search index in one batch, if it has been built"""
+        if tasks and self._search_index is not None:
+            self._search_index.add_many((task.id, _search_text(task)) for task in tasks)
+
+    def _index_name(self, task):
+        """Add a task's name to the name index"""
+        key = name_key(task.name)
+        if key in self._names:
+            self._shadowed.setdefault(key, []).append(task.id)
+        else:
+            self._names[key] = task.id
+
+    def _unindex_name(self, task):
+        """Drop a task's name from the name index"""
+        key = name_key(task.name)
+        shadowed = self._shadowed.get(key)
+        if self._names.get(key) == task.id:
+            if shadowed:
+                self._names[key] = shadowed.pop(0)
+            else:
+                del self._names[key]
+        elif shadowed and task.id in shadowed:
+            shadowed.remove(task.id)
+        if shadowed is not None and not shadowed:
+            del self._shadowed[key]
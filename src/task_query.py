@@ -0,0 +1,95 @@
+from search_index import text_matches
+
+
+class TaskQuery:
+    """
+    An immutable combination of task filters, usable as a dictionary key.
+
+    status, priority and category must equal the given value; due_from and
+    due_to bound the due date ordinal (inclusive, excluding tasks without a
+    due date); unfinished leaves out completed tasks; text must match the
+    task's name and category the way the search box does. Criteria left as
+    None (or False) don't filter.
+    """
+    __slots__ = ('status', 'priority', 'category', 'due_from', 'due_to', 'unfinished', 'text', '_match')
+
+    def __init__(self, status=None, priority=None, category=None, due_from=None, due_to=None,
+                 unfinished=False, text=None):
+        self.status = status
+        self.priority = priority
+        self.category = category
+        self.due_from = due_from
+        self.due_to = due_to
+        self.unfinished = bool(unfinished)
+        self.text = " ".join(text.casefold().split()) or None if text else None
+        self._match = None
+
+    def _key(self):
+        return (self.status, self.priority, self.category, self.due_from, self.due_to,
+                self.unfinished, self.text)
+
+    def __eq__(self, other):
+        return isinstance(other, TaskQuery) and self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __repr__(self):
+        fields = ", ".join(
+            f"{name}={value!r}" for name, value in zip(self.__slots__, self._key()) if value
+        )
+        return f"TaskQuery({fields})"
+
+    @property
+    def has_due_range(self):
+        return self.due_from is not None or self.due_to is not None
+
+    def narrow(self, status=None, priority=None, category=None, due_from=None, due_to=None,
+               unfinished=False, text=None):
+        """
+        A query matching tasks that match both this query and the given
+        criteria. Due ranges intersect and search words add up; asking for two
+        different values of status, priority or category raises ValueError.
+        """
+        values = {}
+        for name, value in (('status', status), ('priority', priority), ('category', category)):
+            own = getattr(self, name)
+            if own is not None and value is not None and own != value:
+                raise ValueError(f"Conflicting {name} filters: {own} and {value}")
+            values[name] = value if value is not None else own
+        bounds = [bound for bound in (self.due_from, due_from) if bound is not None]
+        values['due_from'] = max(bounds) if bounds else None
+        bounds = [bound for bound in (self.due_to, due_to) if bound is not None]
+        values['due_to'] = min(bounds) if bounds else None
+        values['unfinished'] = self.unfinished or unfinished
+        values['text'] = " ".join(filter(None, (self.text, text)))
+        return TaskQuery(**values)
+
+    def matches(self, task):
+        """Whether a task passes every criterion"""
+        if self._match is None:
+            self._match = self.matcher()
+        return self._match(task)
+
+    def matcher(self, check_text=True):
+        """
+        A predicate testing one task against the query; pass check_text=False
+        when the tasks already come from a search for the query's text.
+        """
+        status, priority, category = self.status, self.priority, self.category
+        dated = self.has_due_range
+        first = self.due_from if self.due_from is not None else 1
+        last = self.due_to if self.due_to is not None else float('inf')
+        unfinished = self.unfinished
+        text = self.text if check_text else None
+
+        def match(task):
+            return (
+                (status is None or task.status == status)
+                and (priority is None or task.priority == priority)
+                and (category is None or task.category == category)
+                and (not unfinished or task.status != "Completed")
+                and (not dated or first <= task.due_ordinal <= last)
+                and (text is None or text_matches(text, f"{task.name} {task.category}"))
+            )
+        return match
@@ -0,0 +1,383 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import date
+
+import metrics
+from history import EditHistory, UNDO_DEPTH, diff_fields
+from storage import Task
+from task_collection import TaskCollection, build_search_index
+from task_query import TaskQuery
+from task_sort import check_order, sort_tasks, insert_sorted, remove_sorted
+
+DUE_FILTERS = ("Overdue", "Due Today", "Next 7 Days")
+FILTERS = ("All", "Pending", "Completed") + DUE_FILTERS
+UPCOMING_DAYS = 7
+# Bulk changes touching more than this share of the tasks re-sort cached views instead of patching them
+BULK_RESORT_RATIO = 0.1
+# Most query results kept; the least recently used is dropped first
+MAX_VIEWS = 32
+# Due-date filters list the soonest first unless another order is asked for
+DUE_ORDER = (("Due Date", False),)
+
+
+def due_range(filter_name, today=None):
+    """Inclusive (first, last) due ordinals covered by a due-date filter"""
+    today = (today or date.today()).toordinal()
+    if filter_name == "Overdue":
+        return 1, today - 1
+    if filter_name == "Due Today":
+        return today, today
+    if filter_name == "Next 7 Days":
+        return today, today + UPCOMING_DAYS - 1
+    raise ValueError(f"Unknown filter: {filter_name}")
+
+
+def filter_query(filter_name, search=None, today=None):
+    """The TaskQuery behind a list filter, narrowed by search text if given"""
+    if filter_name not in FILTERS:
+        raise ValueError(f"Unknown filter: {filter_name}")
+    if filter_name in DUE_FILTERS:
+        first, last = due_range(filter_name, today)
+        return TaskQuery(due_from=first, due_to=last, unfinished=True, text=search)
+    if filter_name == "All":
+        return TaskQuery(text=search)
+    return TaskQuery(status=filter_name, text=search)
+
+
+class TaskService:
+    """
+    Task operations for one user, independent of any user interface.
+
+    Holds the user's TaskCollection, applies the business rules (name
+    required, names unique ignoring case, completing is one-way) and writes
+    every change through to storage. Rule violations raise ValueError with a
+    message fit to show to the user.
+
+    Query results are memoized per (TaskQuery, sort order) along with the
+    collection version they were computed at. Changes made through the
+    service patch every up-to-date view in place, so a single change never
+    recomputes a view; anything else that changes the collection leaves
+    views out of date and they are recomputed on their next use. Every
+    change is recorded in an EditHistory of up to undo_depth entries for
+    undo and redo.
+    """
+    def __init__(self, storage, username, undo_depth=UNDO_DEPTH):
+        self.storage = storage
+        self.username = username
+        self.tasks = TaskCollection()
+        self.views = OrderedDict()
+        self.history = EditHistory(undo_depth)
+
+    @property
+    def stats(self):
+        """Incrementally maintained TaskStats for the loaded tasks"""
+        return self.tasks.stats
+
+    def load(self):
+        """Load the user's tasks from storage"""
+        task_dicts = self.storage.load_tasks(self.username)
+        self.tasks = TaskCollection(Task.from_dict(task_dict) for task_dict in task_dicts)
+        self.views = OrderedDict()
+        self.history = EditHistory(self.history.undo_stack.maxlen)
+        return self.tasks
+
+    def begin_load(self):
+        """Empty the collection before loading it chunk by chunk"""
+        self.tasks = TaskCollection()
+        self.views = OrderedDict()
+        self.history = EditHistory(self.history.undo_stack.maxlen)
+
+    def read_chunks(self, chunk_size=1000):
+        """
+        Read the user's stored tasks as chunks of Task objects without
+        touching the collection, so it can run on a worker thread.
+        """
+        for task_dicts in self.storage.iter_tasks(self.username, chunk_size):
+            yield [Task.from_dict(task_dict) for task_dict in task_dicts]
+
+    def add_loaded(self, chunk):
+        """Add a chunk of stored tasks read by read_chunks"""
+        self.tasks.extend(chunk)
+
+    def index_chunks(self, chunks):
+        """Build the search index for the chunks read by read_chunks, also on the worker thread"""
+        return build_search_index(task for chunk in chunks for task in chunk)
+
+    def finish_load(self, search_index):
+        """Use an index from index_chunks once every chunk has been added"""
+        self.tasks.use_search_index(search_index)
+
+    def save(self):
+        """Write all tasks to storage"""
+        return self.storage.save_tasks(self.username, [task.to_dict() for task in self.tasks])
+
+    def get_task(self, task_id):
+        """Return a task by id, raising KeyError if it doesn't exist"""
+        task = self.tasks.get(task_id)
+        if task is None:
+            raise KeyError(task_id)
+        return task
+
+    @metrics.timed("service.add_task")
+    def add_task(self, name, priority="Low", due_date="", category="Personal"):
+        """Create, store and return a new task"""
+        name = self._check_name(name)
+        task = Task(name, priority, due_date, category)
+        with self._patching_views([task]):
+            self.tasks.add(task)
+        stored = task.to_dict()
+        self.history.record([(task.id, None, stored)])
+        self.storage.put_task(self.username, stored)
+        return task
+
+    @metrics.timed("service.update_task")
+    def update_task(self, task_id, **fields):
+        """Change fields of a task and store it"""
+        task = self.get_task(task_id)
+        if 'name' in fields:
+            fields['name'] = self._check_name(fields['name'], exclude_id=task.id)
+        before = task.to_dict()
+        with self._patching_views([task]):
+            self.tasks.update(task, **fields)
+        stored = task.to_dict()
+        self.history.record([(task.id,) + diff_fields(before, stored)])
+        self.storage.put_task(self.username, stored)
+        return task
+
+    @metrics.timed("service.complete_task")
+    def complete_task(self, task_id):
+        """Mark a task completed; returns False if it already was"""
+        task = self.get_task(task_id)
+        if task.status == "Completed":
+            return False
+        with self._patching_views([task]):
+            self.tasks.update(task, status="Completed")
+        self.history.record([(task.id, {'status': "Pending"}, {'status': "Completed"})])
+        self.storage.put_task(self.username, task.to_dict())
+        return True
+
+    @metrics.timed("service.delete_task")
+    def delete_task(self, task_id):
+        """Delete a task and return it"""
+        task = self.get_task(task_id)
+        with self._patching_views([task]):
+            self.tasks.remove(task)
+        self.history.record([(task.id, task.to_dict(), None)])
+        self.storage.delete_task(self.username, task.id)
+        return task
+
+    @metrics.timed("service.bulk_update")
+    def bulk_update(self, task_ids, **fields):
+        """
+        Change the same fields on several tasks as one transaction.
+
+        Every id is checked before anything changes, and storage gets a
+        single write. Names must stay unique, so they can't be bulk-changed.
+        Returns the tasks that actually changed.
+        """
+        if 'name' in fields:
+            raise ValueError("Task names can't be changed in bulk")
+        tasks = [self.get_task(task_id) for task_id in dict.fromkeys(task_ids)]
+        changed = [
+            task for task in tasks
+            if any(getattr(task, field) != value for field, value in fields.items())
+        ]
+        before = {task.id: task.to_dict() for task in changed}
+        with self._patching_views(changed):
+            for task in changed:
+                self.tasks.update(task, **fields)
+        stored = {task.id: task.to_dict() for task in changed}
+        self.history.record(
+            (task_id,) + diff_fields(before[task_id], after) for task_id, after in stored.items()
+        )
+        self.storage.apply_changes(self.username, stored)
+        return changed
+
+    def complete_tasks(self, task_ids):
+        """Mark several tasks completed in one write; returns those that weren't already"""
+        return self.bulk_update(task_ids, status="Completed")
+
+    @metrics.timed("service.delete_tasks")
+    def delete_tasks(self, task_ids):
+        """Delete several tasks in one write and return them"""
+        tasks = [self.get_task(task_id) for task_id in dict.fromkeys(task_ids)]
+        with self._patching_views(tasks):
+            for task in tasks:
+                self.tasks.remove(task)
+        self.history.record((task.id, task.to_dict(), None) for task in tasks)
+        self.storage.apply_changes(self.username, {task.id: None for task in tasks})
+        return tasks
+
+    @metrics.timed("service.add_imported")
+    def add_imported(self, tasks):
+        """
+        Add a chunk of imported Task objects in one write, skipping names
+        or ids that already exist. Imports are not recorded for undo, so
+        the history stays small however many rows come in.
+        Returns (added, skipped) lists.
+        """
+        if len(tasks) > BULK_RESORT_RATIO * len(self.tasks):
+            # Cached views go out of date and are recomputed on demand
+            added, skipped = self.tasks.add_many(tasks)
+        else:
+            added = []
+            with self._patching_views(added):
+                new, skipped = self.tasks.add_many(tasks)
+                added.extend(new)
+        self.storage.apply_changes(self.username, {task.id: task.to_dict() for task in added})
+        return added, skipped
+
+    @metrics.timed("service.undo")
+    def undo(self):
+        """Revert the latest edit; returns False if there is nothing to undo"""
+        states = self.history.undo_states()
+        if states is None:
+            return False
+        self._restore(states)
+        self.history.undone()
+        return True
+
+    @metrics.timed("service.redo")
+    def redo(self):
+        """Reapply the latest undone edit; returns False if there is nothing to redo"""
+        states = self.history.redo_states()
+        if states is None:
+            return False
+        self._restore(states)
+        self.history.redone()
+        return True
+
+    def filter_tasks(self, filter_name="All", tasks=None, search=None):
+        """
+        Tasks (of all, or of the given ones) for a list filter: All, Pending,
+        Completed or one of the due-date filters, narrowed to those matching
+        the search text if given. Due-date filters list unfinished tasks,
+        soonest first.
+        """
+        query = filter_query(filter_name, search)
+        order = DUE_ORDER if query.has_due_range else ()
+        if tasks is None:
+            return list(self.view(query, order))
+        tasks = [task for task in tasks if query.matches(task)]
+        if order:
+            tasks.sort(key=lambda task: task.due_ordinal)
+        return tasks
+
+    @metrics.timed("service.sorted_tasks")
+    def sorted_tasks(self, filter_name="All", order=(), search=None):
+        """
+        Tasks for a list filter in a multi-key sort order of (column,
+        descending) pairs, narrowed by the search text if given.
+
+        The returned list is a cached view shared with later calls and
+        must not be modified.
+        """
+        order = check_order(order)
+        query = filter_query(filter_name, search)
+        if not order and query.has_due_range:
+            order = DUE_ORDER
+        return self.view(query, order)
+
+    @metrics.timed("service.view")
+    def view(self, query, order=()):
+        """
+        Tasks matching a TaskQuery, in a sort order of (column, descending)
+        pairs or in insertion order. The returned list is shared with the
+        view cache and must not be modified.
+        """
+        order = check_order(order)
+        key = (query, order)
+        entry = self.views.get(key)
+        if entry is not None and entry[0] == self.tasks.version:
+            self.views.move_to_end(key)
+            metrics.count("service.view_hits")
+            return entry[1]
+        tasks = self.tasks.select(query)
+        if order:
+            sort_tasks(tasks, order, self.tasks.sort_key)
+        self.views[key] = [self.tasks.version, tasks]
+        self.views.move_to_end(key)
+        if len(self.views) > MAX_VIEWS:
+            self.views.popitem(last=False)
+        return tasks
+
+    def query(self, status=None, priority=None, category=None, text=None, tasks=None):
+        """
+        Tasks (of all, or of the given ones) matching every given criterion,
+        in insertion order; text matches names and categories like the
+        search box
+        """
+        query = TaskQuery(status=status, priority=priority, category=category, text=text)
+        if tasks is None:
+            return list(self.view(query))
+        return [task for task in tasks if query.matches(task)]
+
+    def _restore(self, states):
+        """
+        Put tasks into recorded states in one write: each state is the task
+        dictionary (or changed fields) to apply, or None to delete the task.
+        """
+        for task_id, state in states:
+            task = self.tasks.get(task_id)
+            if state is not None and 'name' in state and self.tasks.name_exists(state['name'], exclude_id=task_id):
+                raise ValueError("A task with this name already exists")
+            if state is not None and task is None and 'id' not in state:
+                raise ValueError("The task no longer exists")
+
+        tasks = [task for task in (self.tasks.get(task_id) for task_id, _ in states) if task is not None]
+        changes = {}
+        with self._patching_views(tasks):
+            for task_id, state in states:
+                task = self.tasks.get(task_id)
+                if state is None:
+                    if task is not None:
+                        self.tasks.remove(task)
+                    changes[task_id] = None
+                elif task is None:
+                    task = Task.from_dict(state)
+                    self.tasks.extend([task])
+                    tasks.append(task)
+                    changes[task_id] = task.to_dict()
+                else:
+                    self.tasks.update(task, **state)
+                    changes[task_id] = task.to_dict()
+        self.storage.apply_changes(self.username, changes)
+
+    @contextmanager
+    def _patching_views(self, tasks):
+        """
+        Patch the up-to-date cached views around a change of tasks, so they
+        stay current without being recomputed. Tasks the change adds to the
+        collection may be appended to tasks.
+        """
+        if len(tasks) > BULK_RESORT_RATIO * len(self.tasks):
+            # Cheaper to recompute on demand; the version bump marks them out of date
+            yield
+            return
+        version = self.tasks.version
+        current = [(query, order, entry) for (query, order), entry in self.views.items()
+                   if entry[0] == version]
+        for task in tasks:
+            if task in self.tasks:
+                for query, order, entry in current:
+                    if query.matches(task):
+                        remove_sorted(entry[1], task, order, self.tasks.sort_key)
+        try:
+            yield
+        finally:
+            for task in tasks:
+                if task in self.tasks:
+                    for query, order, entry in current:
+                        if query.matches(task):
+                            insert_sorted(entry[1], task, order, self.tasks.sort_key)
+            for _, _, entry in current:
+                entry[0] = self.tasks.version
+
+    def _check_name(self, name, exclude_id=None):
+        """Validate a task name and return it stripped"""
+        name = (name or "").strip()
+        if not name:
+            raise ValueError("Please enter a task name")
+        if self.tasks.name_exists(name, exclude_id=exclude_id):
+            raise ValueError("A task with this name already exists")
+        return name
@@ -0,0 +1,120 @@
+"""
+Multi-key task ordering for the task list.
+
+A sort order is a sequence of (column, descending) pairs, primary key
+first. Each task's sort key is a tuple with one entry per column plus its
+insertion position as the final tie-breaker; TaskCollection computes it
+once and caches it until the task changes.
+"""
+SORT_COLUMNS = ("Name", "Priority", "Due Date", "Category", "Status")
+PRIORITY_RANK = {"High": 0, "Medium": 1, "Low": 2}
+STATUS_RANK = {"Pending": 0, "Completed": 1}
+# Tasks without a due date sort after every real date
+NO_DUE_DATE = 10 ** 7
+
+_COLUMN_INDEX = {column: i for i, column in enumerate(SORT_COLUMNS)}
+_POSITION = len(SORT_COLUMNS)
+_FIELD_COLUMNS = {column.lower().replace(" ", "_"): column for column in SORT_COLUMNS}
+
+
+def make_sort_key(task, position):
+    """Sort key tuple for a task at the given insertion position"""
+    return (
+        task.name.casefold(),
+        PRIORITY_RANK.get(task.priority, len(PRIORITY_RANK)),
+        task.due_ordinal or NO_DUE_DATE,
+        task.category.casefold(),
+        STATUS_RANK.get(task.status, len(STATUS_RANK)),
+        position,
+    )
+
+
+def check_order(order):
+    """Validate a sort order and return it as a tuple"""
+    order = tuple((column, bool(descending)) for column, descending in order)
+    for column, _ in order:
+        if column not in _COLUMN_INDEX:
+            raise ValueError(f"Unknown sort column: {column}")
+    return order
+
+
+def parse_order(value):
+    """
+    Sort order from comma-separated column names like "priority,-due_date":
+    columns in lower case with underscores, "-" for descending.
+    """
+    order = []
+    for name in filter(None, (part.strip() for part in value.split(","))):
+        column = _FIELD_COLUMNS.get(name.lstrip("-+"))
+        if column is None:
+            raise ValueError(f"Unknown sort column: {name}")
+        order.append((column, name.startswith("-")))
+    return tuple(order)
+
+
+def sort_tasks(tasks, order, sort_key):
+    """
+    Sort a list of tasks in place.
+
+    When every key runs the same direction this is one sort on a key tuple,
+    which is close to linear for a sorted list with new tasks appended;
+    mixed directions fall back to one stable pass per key.
+    """
+    if not order:
+        tasks.sort(key=lambda task: sort_key(task)[_POSITION])
+        return tasks
+    indexes = [_COLUMN_INDEX[column] for column, _ in order]
+    directions = {descending for _, descending in order}
+    if len(directions) == 1:
+        # Negated positions keep ties in insertion order under reverse=True
+        sign = -1 if True in directions else 1
+
+        def key(task):
+            values = sort_key(task)
+            return tuple([values[i] for i in indexes] + [sign * values[_POSITION]])
+        tasks.sort(key=key, reverse=sign < 0)
+        return tasks
+    tasks.sort(key=lambda task: sort_key(task)[_POSITION])
+    for (_, descending), i in reversed(list(zip(order, indexes))):
+        tasks.sort(key=lambda task: sort_key(task)[i], reverse=descending)
+    return tasks
+
+
+def compare_keys(order):
+    """Three-way comparison of two sort key tuples under a sort order"""
+    indexes = [(_COLUMN_INDEX[column], descending) for column, descending in order]
+
+    def compare(a, b):
+        for i, descending in indexes:
+            if a[i] != b[i]:
+                return (1 if a[i] > b[i] else -1) * (-1 if descending else 1)
+        return (a[_POSITION] > b[_POSITION]) - (a[_POSITION] < b[_POSITION])
+    return compare
+
+
+def _bisect(tasks, key, order, sort_key):
+    """Index of the first task in a sorted list that doesn't sort before key"""
+    compare = compare_keys(order)
+    low, high = 0, len(tasks)
+    while low < high:
+        middle = (low + high) // 2
+        if compare(sort_key(tasks[middle]), key) < 0:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def insert_sorted(tasks, task, order, sort_key):
+    """Insert a task into a list sorted by order"""
+    tasks.insert(_bisect(tasks, sort_key(task), order, sort_key), task)
+
+
+def remove_sorted(tasks, task, order, sort_key):
+    """Remove a task from a list sorted by order; returns False if it isn't there"""
+    i = _bisect(tasks, sort_key(task), order, sort_key)
+    if i < len(tasks) and tasks[i] is task:
+        del tasks[i]
+        return True
+    return False
+
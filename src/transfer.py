@@ -0,0 +1,211 @@
+"""
+Streaming import and export of tasks as CSV or JSON Lines.
+
+Files are read and written in chunks of task dictionaries, so memory stays
+bounded by the chunk size however large the file is. Imported tasks whose
+name (ignoring case) or id already exists are skipped; those checks use
+CompactSets of 64-bit hashes, a few bytes per task rather than a string.
+
+Command line:
+    python src/transfer.py import USERNAME FILE [--data-dir DIR] [--format csv|jsonl]
+    python src/transfer.py export USERNAME FILE [--data-dir DIR] [--format csv|jsonl]
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+
+from compact_set import CompactSet
+from ids import new_ids
+from storage import LOAD_CHUNK_SIZE, Task, open_storage
+from task_collection import name_key
+
+FIELDS = ('id', 'name', 'priority', 'due_date', 'category', 'status', 'created_at')
+FORMATS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}
+DEFAULTS = {'priority': "Low", 'due_date': "", 'category': "Personal", 'status': "Pending"}
+
+
+def detect_format(path, fmt=None):
+    """File format from an explicit name or the file extension"""
+    if fmt is None:
+        fmt = FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt not in ('csv', 'jsonl'):
+        raise ValueError(f"Unknown file format for {path}: use .csv or .jsonl")
+    return fmt
+
+
+def _row_values(row):
+    """Stripped field values of an imported row, or None if it has no name"""
+    if not isinstance(row, dict):
+        return None
+    values = {}
+    for field in FIELDS:
+        value = row.get(field)
+        value = "" if value is None else str(value).strip()
+        values[field] = value or DEFAULTS.get(field, "")
+    return values if values['name'] else None
+
+
+def tasks_from_rows(rows):
+    """
+    Build a Task from each imported row, None for rows that aren't an object
+    or have no name. Rows without an id share one new_ids batch; an empty
+    created_at gets a fresh one.
+    """
+    rows = [_row_values(row) for row in rows]
+    fresh = iter(new_ids(sum(1 for values in rows if values and not values['id'])))
+    tasks = []
+    for values in rows:
+        if values is None:
+            tasks.append(None)
+            continue
+        if not values['id']:
+            values['id'] = next(fresh)
+        tasks.append(Task.from_dict(values))
+    return tasks
+
+
+def _json_rows(lines):
+    """Parse JSON Lines, yielding None for lines that aren't valid JSON"""
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+
+def read_task_chunks(path, fmt=None, chunk_size=LOAD_CHUNK_SIZE):
+    """
+    Stream a CSV or JSON Lines file as (tasks, invalid rows, fraction read)
+    tuples, holding one chunk at a time.
+    """
+    fmt = detect_format(path, fmt)
+    total = os.path.getsize(path) or 1
+    with open(path, 'rb') as raw:
+        text = io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+        if fmt == 'csv':
+            rows = csv.DictReader(text)
+        else:
+            rows = _json_rows(text)
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                tasks = [task for task in tasks_from_rows(chunk) if task is not None]
+                yield tasks, len(chunk) - len(tasks), min(1.0, raw.tell() / total)
+                chunk = []
+        tasks = [task for task in tasks_from_rows(chunk) if task is not None]
+        yield tasks, len(chunk) - len(tasks), 1.0
+
+
+def write_task_file(path, chunks, fmt=None, progress=None, total=None, cancel=None):
+    """
+    Write chunks of task dictionaries to a CSV or JSON Lines file.
+    Returns the number of tasks written.
+    """
+    fmt = detect_format(path, fmt)
+    written = 0
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+            if fmt == 'csv':
+                writer = csv.DictWriter(f, fieldnames=FIELDS, extrasaction='ignore')
+                writer.writeheader()
+            for chunk in chunks:
+                if cancel is not None and cancel.is_set():
+                    break
+                if fmt == 'csv':
+                    writer.writerows(chunk)
+                else:
+                    f.writelines(json.dumps(task, ensure_ascii=False) + "\n" for task in chunk)
+                written += len(chunk)
+                if progress is not None:
+                    progress(min(1.0, written / total) if total else 0.0)
+    except BaseException:
+        # A half-written export never replaces the target
+        os.remove(tmp_path)
+        raise
+    if cancel is not None and cancel.is_set():
+        os.remove(tmp_path)
+        return written
+    os.replace(tmp_path, path)
+    return written
+
+
+def export_tasks(storage, username, path, fmt=None, progress=None, total=None, cancel=None):
+    """Stream a user's stored tasks to a file; returns the number written"""
+    return write_task_file(path, storage.iter_tasks(username, LOAD_CHUNK_SIZE), fmt,
+                           progress, total, cancel)
+
+
+def import_tasks(storage, username, path, fmt=None, progress=None, cancel=None):
+    """
+    Stream tasks from a file straight into storage, one write per chunk.
+
+    Besides one chunk, only hashes of the names and ids seen so far are held
+    in memory. Returns (imported, skipped) counts; skipped includes rows
+    without a name.
+    """
+    names = CompactSet()
+    ids = CompactSet()
+    for chunk in storage.iter_tasks(username, LOAD_CHUNK_SIZE):
+        for task in chunk:
+            names.add(name_key(task.get('name', '')))
+            ids.add(str(task.get('id')))
+
+    imported = skipped = 0
+    for tasks, invalid, fraction in read_task_chunks(path, fmt):
+        if cancel is not None and cancel.is_set():
+            break
+        changes = {}
+        for task in tasks:
+            key = name_key(task.name)
+            if key in names or str(task.id) in ids:
+                skipped += 1
+                continue
+            names.add(key)
+            ids.add(str(task.id))
+            changes[task.id] = task.to_dict()
+        if changes and not storage.apply_changes(username, changes):
+            raise IOError(f"Could not save imported tasks for {username}")
+        imported += len(changes)
+        skipped += invalid
+        if progress is not None:
+            progress(fraction)
+    return imported, skipped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import or export a user's tasks as CSV or JSON Lines")
+    parser.add_argument("action", choices=["import", "export"])
+    parser.add_argument("username")
+    parser.add_argument("path")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--format", choices=["csv", "jsonl"])
+    args = parser.parse_args(argv)
+
+    storage = open_storage(args.data_dir)
+    try:
+        if args.action == "import":
+            imported, skipped = import_tasks(storage, args.username, args.path, args.format)
+            print(f"Imported {imported} tasks, skipped {skipped}")
+        else:
+            written = export_tasks(storage, args.username, args.path, args.format)
+            print(f"Exported {written} tasks")
+    except (ValueError, IOError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if hasattr(storage, 'wait_for_compaction'):
+            storage.wait_for_compaction()
+        else:
+            storage.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())